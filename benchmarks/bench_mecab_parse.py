@@ -0,0 +1,54 @@
+# encoding: UTF-8
+"""Measures morphemes/sec of the bulk `Tagger.parse` path against walking
+`parseToNode`, on short sentences and on one long text.
+
+Usage:
+    python benchmarks/bench_mecab_parse.py [--repeat N]
+"""
+import time
+import argparse
+
+from hangul_utils.preprocess import Preprocessor
+
+SENTS = [
+    "앞 집 팥죽은 붉은 팥 풋팥죽이고, 뒷집 콩죽은 햇콩 단콩 콩죽.",
+    "KT향 단말기의 경우 SKT 유심 인식 이력이 있어야 합니다.",
+    "그러나 베네수엘라는 독일 보다 한 단계 위였다.",
+    "현 시점에서 눈에 띄는 선수가 몇몇 있다."
+]
+
+
+def run(parse, texts):
+    n = 0
+    t = time.perf_counter()
+    for text in texts:
+        for _ in parse(text):
+            n += 1
+    return n / (time.perf_counter() - t)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    p = Preprocessor()
+    mecab = p._mecab
+    short = SENTS * args.repeat
+    long = [" ".join(short)]
+
+    def features(text):
+        # decodes every feature field of every morpheme
+        return [f.expression for _, f in p.morph_features(text)]
+
+    for name, texts in (("short", short), ("long", long)):
+        print(f"{name:5s} node walk: "
+              f"{run(mecab.parse_nodes, texts):12.1f} morphemes/sec")
+        print(f"{name:5s} bulk:      "
+              f"{run(mecab.parse, texts):12.1f} morphemes/sec")
+        print(f"{name:5s} features:  "
+              f"{run(features, texts):12.1f} morphemes/sec")
+
+
+if __name__ == '__main__':
+    main()
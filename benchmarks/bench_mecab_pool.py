@@ -0,0 +1,55 @@
+# encoding: UTF-8
+"""Measures tokenization calls/sec with and without tagger reuse.
+
+Usage:
+    python benchmarks/bench_mecab_pool.py [--calls N] [--threads N]
+"""
+import time
+import argparse
+import threading
+
+from hangul_utils.preprocess import Preprocessor, _MecabPool
+
+TEXT = "앞 집 팥죽은 붉은 팥 풋팥죽이고, 뒷집 콩죽은 햇콩 단콩 콩죽."
+
+
+class _FreshPool(_MecabPool):
+    """Reproduces the old behaviour: a new tagger for every call."""
+
+    def get(self):
+        return self._create()
+
+
+def run(p, calls, threads):
+    def work(n):
+        for _ in range(n):
+            list(p.morph_tokenize(TEXT))
+
+    workers = [threading.Thread(target=work, args=(calls // threads,))
+               for _ in range(threads)]
+    t = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return calls / (time.perf_counter() - t)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    fresh = Preprocessor()
+    fresh._mecab_pool = _FreshPool(fresh._dic_path)
+    pooled = Preprocessor()
+
+    print(f"tagger per call: {run(fresh, args.calls, args.threads):10.1f} "
+          f"calls/sec")
+    print(f"pooled tagger:   {run(pooled, args.calls, args.threads):10.1f} "
+          f"calls/sec")
+
+
+if __name__ == '__main__':
+    main()
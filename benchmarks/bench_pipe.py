@@ -0,0 +1,46 @@
+# encoding: UTF-8
+"""Measures how `Preprocessor.pipe` throughput scales with the number of
+worker threads and processes.
+
+Usage:
+    python benchmarks/bench_pipe.py [--texts N] [--workers 1 2 4]
+"""
+import time
+import argparse
+
+from hangul_utils.preprocess import Preprocessor
+
+TEXTS = [
+    "앞 집 팥죽은 붉은 팥 풋팥죽이고, 뒷집 콩죽은 햇콩 단콩 콩죽.",
+    "KT향 단말기의 경우 SKT 유심 인식 이력이 있어야 합니다.",
+    "그러나 베네수엘라는 독일 보다 한 단계 위였다. 현 시점에서 눈에 띄는 "
+    "선수가 몇몇 있다."
+]
+
+
+def run(p, texts, batch_size, **kwargs):
+    t = time.perf_counter()
+    for _ in p.pipe(texts, batch_size=batch_size, **kwargs):
+        pass
+    return len(texts) / (time.perf_counter() - t)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--texts", type=int, default=30000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    texts = (TEXTS * (args.texts // len(TEXTS) + 1))[:args.texts]
+    p = Preprocessor()
+
+    for n in args.workers:
+        threads = run(p, texts, args.batch_size, n_threads=n)
+        processes = run(p, texts, args.batch_size, n_process=n)
+        print(f"{n:3d} workers: threads {threads:10.1f} texts/sec, "
+              f"processes {processes:10.1f} texts/sec")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+# encoding: UTF-8
+"""Measures jamo split/join throughput on mixed-script text.
+
+Usage:
+    python benchmarks/bench_unicode.py [--repeat N]
+"""
+import time
+import argparse
+
+from hangul_utils import split_syllables, join_jamos, \
+    split_syllables_batch, join_jamos_batch
+
+TEXT = "KT향 단말기의 경우 SKT 유심 인식 이력이 있어야 합니다. 주변의 SKT " \
+       "사용 고객의 유심, 혹은 가까운 SKT 매장의 유심을 고객님의 핸드폰에 " \
+       "꽂은 후 2-3번 정도 껐다 킨 다음 유심을 꽂아주세요! ㅋㅋㅋ ㅠㅠ (^^)\n"
+
+
+def bench(name, func, text, repeat):
+    t = time.perf_counter()
+    for _ in range(repeat):
+        func(text)
+    elapsed = time.perf_counter() - t
+    n = len(text) if isinstance(text, str) else sum(map(len, text))
+    print(f"{name:<28s} {n * repeat / elapsed / 1e6:8.2f} Mchars/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    text = TEXT * 100
+    jamos = split_syllables(text)
+    bench("split_syllables", split_syllables, text, args.repeat)
+    bench("split_syllables(pad)", lambda x: split_syllables(x, pad="x"),
+          text, args.repeat)
+    bench("join_jamos", join_jamos, jamos, args.repeat)
+
+    lines = text.splitlines()
+    padded = [split_syllables(line, pad="_") for line in lines]
+    bench("split_syllables_batch", split_syllables_batch, lines, args.repeat)
+    bench("split_syllables_batch(pad)",
+          lambda x: split_syllables_batch(x, pad="_"), lines, args.repeat)
+    bench("join_jamos_batch(pad)", lambda x: join_jamos_batch(x, pad="_"),
+          padded, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,3 +2,9 @@ __version__ = "0.4.5"
 
 from .unicode import *
 from .preprocess import *
+from .document import *
+from .cache import *
+from .aio import *
+from .corpus import *
+from .normalizer import *
+from .server import *
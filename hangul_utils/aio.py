@@ -0,0 +1,213 @@
+__all__ = ["AsyncPreprocessor"]
+
+import os
+import asyncio
+import concurrent.futures
+
+from .preprocess import Preprocessor, PIPE_TASKS
+
+
+class AsyncPreprocessor(object):
+    """An asyncio facade of `Preprocessor` that does not block the event
+    loop.
+
+    Requests are queued and coalesced into micro-batches: a batch is
+    dispatched to a bounded thread pool once it has `max_batch_size`
+    requests or its first request has waited `max_latency` seconds. When
+    all workers are busy, batches stop being dispatched, the queue fills up
+    and further requests wait for a free slot (backpressure) instead of
+    piling up in memory. Cancelled requests are dropped from their batch if
+    it has not started yet.
+
+    The instance is bound to the event loop it is first used in.
+
+    Arguments:
+        preprocessor: the `Preprocessor` to run requests on; a new one by
+            default.
+        max_workers: number of worker threads, each with its own MeCab
+            tagger. Defaults to the number of CPUs.
+        max_batch_size: maximum number of requests in a batch.
+        max_latency: maximum time in seconds a request waits for its batch
+            to fill up.
+        max_pending: maximum number of queued requests.
+    """
+
+    def __init__(self, preprocessor=None, max_workers=None,
+                 max_batch_size=64, max_latency=0.005, max_pending=1024):
+        if preprocessor is None:
+            preprocessor = Preprocessor()
+
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+
+        self.preprocessor = preprocessor
+        self.max_workers = max_workers
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.max_pending = max_pending
+        self._executor = None
+        self._queue = None
+        self._slots = None
+        self._batcher = None
+        # the batch being filled up, failed by `close` if it is cancelled
+        self._batch = []
+        self._running = set()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _start(self):
+        if self._batcher is not None:
+            return
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            self.max_workers, thread_name_prefix="hangul-utils"
+        )
+        self._queue = asyncio.Queue(self.max_pending)
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._batcher = asyncio.get_running_loop().create_task(
+            self._batch_loop()
+        )
+
+    async def _submit(self, task, text, kwargs):
+        if task not in PIPE_TASKS:
+            raise ValueError(f"unsupported task: {task}; must be one of "
+                             f"{sorted(PIPE_TASKS)}")
+
+        self._start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((task, text, kwargs, future))
+
+        return await future
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            self._batch = batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_latency
+
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+
+                    if remaining <= 0:
+                        break
+
+                    await asyncio.sleep(remaining)
+
+            await self._slots.acquire()
+            running = loop.create_task(self._run(batch))
+            self._batch = []
+            self._running.add(running)
+            running.add_done_callback(self._running.discard)
+
+    async def _run(self, batch):
+        try:
+            batch = [item for item in batch if not item[3].done()]
+
+            if not batch:
+                return
+
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, self._run_batch,
+                    [item[:3] for item in batch]
+                )
+            except Exception as e:
+                results = [(e, None)] * len(batch)
+
+            for (_, _, _, future), (error, result) in zip(batch, results):
+                if future.done():
+                    continue
+
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+
+    def _run_batch(self, items):
+        # requests for the same task and arguments run as one call, e.g. a
+        # single `normalize_batch`
+        groups = {}
+
+        for i, (task, _, kwargs) in enumerate(items):
+            key = task, tuple(sorted(kwargs.items()))
+            groups.setdefault(key, []).append(i)
+
+        results = [None] * len(items)
+
+        for (task, _), indices in groups.items():
+            kwargs = items[indices[0]][2]
+            texts = [items[i][1] for i in indices]
+
+            try:
+                group = [(None, result) for result in
+                         self.preprocessor._run_task(task, texts, kwargs)]
+            except Exception:
+                # fail only the requests that fail on their own
+                group = [self._run_one(task, text, kwargs) for text in texts]
+
+            for i, result in zip(indices, group):
+                results[i] = result
+
+        return results
+
+    def _run_one(self, task, text, kwargs):
+        try:
+            return None, self.preprocessor._run_task(task, [text], kwargs)[0]
+        except Exception as e:
+            return e, None
+
+    async def close(self):
+        """Stops the batcher, fails queued requests and requests of a batch
+        that has not been dispatched yet, and shuts down the worker
+        threads."""
+        if self._batcher is None:
+            return
+
+        self._batcher.cancel()
+
+        try:
+            await self._batcher
+        except asyncio.CancelledError:
+            pass
+
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+        pending = self._batch
+
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+
+        for future in (item[3] for item in pending):
+            if not future.done():
+                future.set_exception(RuntimeError("preprocessor closed"))
+
+        self._executor.shutdown(wait=False)
+        self._batcher = None
+        self._batch = []
+
+    async def normalize(self, text):
+        return await self._submit("normalize", text, {})
+
+    async def word_tokenize(self, text):
+        """Returns the list of words."""
+        return await self._submit("word", text, {})
+
+    async def sent_tokenize(self, text, residual=True):
+        """Returns the list of sentences."""
+        return await self._submit("sent", text, {"residual": residual})
+
+    async def morph_tokenize(self, text, pos=False):
+        """Returns the list of morphemes, or morpheme and pos tuples if pos
+        is True."""
+        return await self._submit("morph", text, {"pos": pos})
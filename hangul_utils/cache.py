@@ -0,0 +1,315 @@
+__all__ = ["LRUCache", "DiskCache"]
+
+import sys
+import time
+import pickle
+import sqlite3
+import hashlib
+import contextlib
+import threading
+import collections
+
+
+def _sizeof(obj):
+    """Approximate memory footprint of strings, bytes and tuples of them."""
+    if isinstance(obj, tuple):
+        return sys.getsizeof(obj) + sum(map(_sizeof, obj))
+    return sys.getsizeof(obj)
+
+
+class LRUCache(object):
+    """A thread-safe, size-bounded least-recently-used cache.
+
+    Arguments:
+        max_entries: maximum number of entries, or None for no limit.
+        max_bytes: maximum approximate size of keys and values in bytes, or
+            None for no limit.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._nbytes = 0
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # copies (e.g. in worker processes) start empty
+        return {"max_entries": self.max_entries, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    @property
+    def nbytes(self):
+        """Approximate size of the cached keys and values in bytes."""
+        return self._nbytes
+
+    def get(self, key, default=None):
+        """Returns the value for key (marking it as recently used), or
+        default if it is not cached."""
+        with self._lock:
+            try:
+                value, _ = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+
+            return value
+
+    def put(self, key, value):
+        """Caches a value, evicting least recently used entries as needed."""
+        size = _sizeof(key) + _sizeof(value)
+
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._data.pop(key, None)
+
+            if old is not None:
+                self._nbytes -= old[1]
+
+            self._data[key] = (value, size)
+            self._nbytes += size
+
+            while ((self.max_entries is not None and
+                    len(self._data) > self.max_entries) or
+                   (self.max_bytes is not None and
+                    self._nbytes > self.max_bytes)):
+                _, (_, size) = self._data.popitem(last=False)
+                self._nbytes -= size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._nbytes = 0
+
+    def stats(self):
+        """Returns a dictionary of hit, miss and eviction counts along with
+        the current number of entries and size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._data),
+            "bytes": self._nbytes
+        }
+
+
+class DiskCache(object):
+    """A persistent cache backed by an SQLite database, safe to share
+    between threads and processes.
+
+    Keys are stored as SHA-1 hashes of the namespace and the key, so results
+    produced with different dictionaries or options never collide as long
+    as those are reflected in the namespace or the key. Entries are written
+    immediately; access times used for eviction are updated in batches.
+
+    Arguments:
+        path: path to the database file.
+        max_bytes: maximum total size of the cached values in bytes, or None
+            for no limit. Least recently used entries are evicted beyond it.
+        namespace: a string mixed into every key.
+    """
+
+    _TOUCH_BATCH = 1000
+
+    def __init__(self, path, max_bytes=None, namespace=""):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._touched = []
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=60,
+                                     isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cache ("
+                           "key BLOB PRIMARY KEY, value BLOB NOT NULL, "
+                           "size INTEGER NOT NULL, accessed REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed "
+                           "ON cache (accessed)")
+        # the total size is shared by every process and updated along with
+        # the entries, so that the limit holds for all of them together
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cache_size ("
+                           "id INTEGER PRIMARY KEY CHECK (id = 0), "
+                           "size INTEGER NOT NULL)")
+        with self._transaction():
+            self._conn.execute("INSERT OR IGNORE INTO cache_size "
+                               "SELECT 0, COALESCE(SUM(size), 0) FROM cache")
+        self._nbytes = self._total_size()
+
+    def __getstate__(self):
+        # connections cannot be pickled; workers reopen the database
+        return {"path": self.path, "max_bytes": self.max_bytes,
+                "namespace": self.namespace}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __len__(self):
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+        return row[0]
+
+    def __contains__(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM cache WHERE key = ?",
+                                     (self._hash(key),)).fetchone()
+        return row is not None
+
+    def _hash(self, key):
+        return hashlib.sha1(repr((self.namespace, key)).encode(
+            "utf-8", "surrogatepass"
+        )).digest()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+        self._conn.execute("COMMIT")
+
+    def _total_size(self):
+        row = self._conn.execute("SELECT size FROM cache_size").fetchone()
+        return row[0]
+
+    def _add_size(self, size):
+        self._conn.execute("UPDATE cache_size SET size = size + ?", (size,))
+
+    def get(self, key, default=None):
+        """Returns the cached value for key, or default if it is not
+        cached."""
+        h = self._hash(key)
+
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM cache WHERE key = ?",
+                                     (h,)).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            self._touched.append((time.time(), h))
+
+            if len(self._touched) >= self._TOUCH_BATCH:
+                self._flush_touched()
+
+        return pickle.loads(row[0])
+
+    def put(self, key, value):
+        """Caches a value, evicting least recently used entries if the size
+        limit is exceeded."""
+        data = pickle.dumps(value, protocol=4)
+
+        h = self._hash(key)
+
+        with self._lock, self._transaction():
+            old = self._conn.execute("SELECT size FROM cache WHERE key = ?",
+                                     (h,)).fetchone()
+            self._conn.execute("INSERT OR REPLACE INTO cache "
+                               "VALUES (?, ?, ?, ?)",
+                               (h, data, len(data), time.time()))
+            self._add_size(len(data) - (old[0] if old is not None else 0))
+            self._nbytes = self._total_size()
+
+            if self.max_bytes is not None and self._nbytes > self.max_bytes:
+                self._evict()
+
+    def _flush_touched(self):
+        if self._touched:
+            self._conn.executemany("UPDATE cache SET accessed = ? "
+                                   "WHERE key = ?", self._touched)
+            del self._touched[:]
+
+    def _evict(self):
+        self._flush_touched()
+        self._nbytes = self._total_size()
+        # evict down to 90% of the limit so that eviction is not triggered
+        # again by every following put
+        excess = self._nbytes - int(self.max_bytes * 0.9)
+        keys = []
+
+        for key, size in self._conn.execute("SELECT key, size FROM cache "
+                                            "ORDER BY accessed"):
+            if excess <= 0:
+                break
+            keys.append((key,))
+            excess -= size
+            self._nbytes -= size
+
+        self._conn.executemany("DELETE FROM cache WHERE key = ?", keys)
+        self._add_size(self._nbytes - self._total_size())
+        self.evictions += len(keys)
+
+    def flush(self):
+        """Writes pending access times to the database."""
+        with self._lock:
+            self._flush_touched()
+
+    def compact(self):
+        """Enforces the size limit and reclaims the space of deleted entries
+        from the database file."""
+        with self._lock:
+            with self._transaction():
+                self._flush_touched()
+                self._nbytes = self._total_size()
+
+                if (self.max_bytes is not None and
+                        self._nbytes > self.max_bytes):
+                    self._evict()
+
+            self._conn.execute("VACUUM")
+
+    def clear(self):
+        with self._lock:
+            del self._touched[:]
+
+            with self._transaction():
+                self._conn.execute("DELETE FROM cache")
+                self._conn.execute("UPDATE cache_size SET size = 0")
+
+            self._nbytes = 0
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._conn.close()
+
+    def stats(self):
+        """Returns a dictionary of hit, miss and eviction counts of this
+        instance along with the current number of entries and size."""
+        with self._lock:
+            self._nbytes = self._total_size()
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self),
+            "bytes": self._nbytes
+        }
@@ -0,0 +1,247 @@
+__all__ = ["CorpusWriter", "Corpus"]
+
+import os
+import sys
+import json
+import mmap
+import array
+
+# Files of a corpus directory.
+VOCAB_FILE = "vocab.txt"
+POS_FILE = "pos.txt"
+TOKENS_FILE = "tokens.i32"
+POS_IDS_FILE = "pos.u16"
+SENT_OFFSETS_FILE = "sents.i64"
+DOC_OFFSETS_FILE = "docs.i64"
+META_FILE = "meta.json"
+
+FORMAT_VERSION = 1
+
+
+class CorpusWriter(object):
+    """Writes a tokenized corpus in a binary format that `Corpus` can
+    memory-map.
+
+    A corpus is a directory of:
+        vocab.txt, pos.txt: the token and pos tag vocabularies, one entry
+            per line in order of id.
+        tokens.i32: token ids of all sentences, concatenated (int32).
+        pos.u16: pos tag ids of the tokens (uint16).
+        sents.i64: token offset of every sentence, followed by the number
+            of tokens (int64).
+        docs.i64: sentence offset of every document, followed by the number
+            of sentences (int64).
+        meta.json: counts, format version and byte order.
+
+    Arrays are written as they are added; only the vocabularies are kept in
+    memory.
+
+    Arguments:
+        path: path to the corpus directory, which is created if needed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._vocab = {}
+        self._pos = {}
+        self._num_tokens = 0
+        self._num_sents = 0
+        self._num_docs = 0
+        self._tokens = open(os.path.join(path, TOKENS_FILE), "wb")
+        self._pos_ids = open(os.path.join(path, POS_IDS_FILE), "wb")
+        self._sents = open(os.path.join(path, SENT_OFFSETS_FILE), "wb")
+        self._docs = open(os.path.join(path, DOC_OFFSETS_FILE), "wb")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def _ids(table, items):
+        ids = []
+
+        for item in items:
+            i = table.get(item)
+
+            if i is None:
+                i = table[item] = len(table)
+
+            ids.append(i)
+
+        return ids
+
+    def add(self, sents):
+        """Adds a document.
+
+        Arguments:
+            sents: list of sentences, each a (tokens, pos tags) tuple of
+                string lists of the same length.
+        """
+        tokens = array.array("i")
+        pos_ids = array.array("H")
+        offsets = array.array("q")
+
+        for forms, tags in sents:
+            offsets.append(self._num_tokens + len(tokens))
+            tokens.extend(self._ids(self._vocab, forms))
+            pos_ids.extend(self._ids(self._pos, tags))
+
+        array.array("q", [self._num_sents]).tofile(self._docs)
+        offsets.tofile(self._sents)
+        tokens.tofile(self._tokens)
+        pos_ids.tofile(self._pos_ids)
+        self._num_tokens += len(tokens)
+        self._num_sents += len(offsets)
+        self._num_docs += 1
+
+    def close(self):
+        if self._tokens.closed:
+            return
+
+        array.array("q", [self._num_tokens]).tofile(self._sents)
+        array.array("q", [self._num_sents]).tofile(self._docs)
+
+        for f in (self._tokens, self._pos_ids, self._sents, self._docs):
+            f.close()
+
+        for name, table in ((VOCAB_FILE, self._vocab),
+                            (POS_FILE, self._pos)):
+            with open(os.path.join(self.path, name), "w",
+                      encoding="utf-8", errors="surrogatepass",
+                      newline="\n") as f:
+                for item in table:
+                    f.write(item)
+                    f.write("\n")
+
+        with open(os.path.join(self.path, META_FILE), "w") as f:
+            json.dump({"version": FORMAT_VERSION,
+                       "byteorder": sys.byteorder,
+                       "num_tokens": self._num_tokens,
+                       "num_sents": self._num_sents,
+                       "num_docs": self._num_docs,
+                       "vocab_size": len(self._vocab),
+                       "num_pos": len(self._pos)}, f, indent=2)
+
+
+def _read_table(path):
+    with open(path, "r", encoding="utf-8", errors="surrogatepass",
+              newline="") as f:
+        # tokens may contain other line breaks, e.g. "\r" or "\x85"
+        return f.read().split("\n")[:-1]
+
+
+class Corpus(object):
+    """A binary corpus written by `CorpusWriter` (or `hangul-process
+    --corpus`), memory-mapped for zero-copy random access.
+
+    Token and pos tag ids are returned as memoryviews into the mapped files;
+    strings are created only by `sentence` and `document`.
+
+    Arguments:
+        path: path to the corpus directory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+
+        if self.meta["version"] != FORMAT_VERSION:
+            raise ValueError(f"unsupported corpus format version: "
+                             f"{self.meta['version']}")
+
+        if self.meta["byteorder"] != sys.byteorder:
+            raise ValueError(f"corpus was written on a "
+                             f"{self.meta['byteorder']}-endian machine")
+
+        self.vocab = _read_table(os.path.join(path, VOCAB_FILE))
+        self.pos_tags = _read_table(os.path.join(path, POS_FILE))
+        self._maps = []
+        self.token_ids = self._map(TOKENS_FILE, "i")
+        self.pos_ids = self._map(POS_IDS_FILE, "H")
+        self.sent_offsets = self._map(SENT_OFFSETS_FILE, "q")
+        self.doc_offsets = self._map(DOC_OFFSETS_FILE, "q")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _map(self, name, fmt):
+        with open(os.path.join(self.path, name), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return memoryview(b"").cast("B").cast(fmt)
+
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        view = memoryview(m)
+        self._maps.append((m, view))
+
+        return view.cast(fmt)
+
+    def close(self):
+        """Releases the memory maps. A map that is still referenced by views
+        obtained from the corpus stays open until they are released."""
+        for view in (self.token_ids, self.pos_ids, self.sent_offsets,
+                     self.doc_offsets):
+            view.release()
+
+        for m, view in self._maps:
+            view.release()
+
+            try:
+                m.close()
+            except BufferError:
+                pass
+
+        del self._maps[:]
+
+    def __len__(self):
+        return self.meta["num_docs"]
+
+    @property
+    def num_sents(self):
+        return self.meta["num_sents"]
+
+    @property
+    def num_tokens(self):
+        return self.meta["num_tokens"]
+
+    def sent_range(self, i):
+        """Returns the (first, last + 1) token offsets of the i-th
+        sentence."""
+        return self.sent_offsets[i], self.sent_offsets[i + 1]
+
+    def doc_range(self, i):
+        """Returns the (first, last + 1) sentence indices of the i-th
+        document."""
+        return self.doc_offsets[i], self.doc_offsets[i + 1]
+
+    def sentence_ids(self, i):
+        """Returns zero-copy views of the token ids and pos tag ids of the
+        i-th sentence."""
+        start, end = self.sent_range(i)
+
+        return self.token_ids[start:end], self.pos_ids[start:end]
+
+    def sentence(self, i, pos=False):
+        """Returns the tokens of the i-th sentence, or token and pos tuples
+        if pos is True."""
+        token_ids, pos_ids = self.sentence_ids(i)
+        tokens = [self.vocab[t] for t in token_ids]
+
+        if pos:
+            return list(zip(tokens, [self.pos_tags[p] for p in pos_ids]))
+
+        return tokens
+
+    def document(self, i, pos=False):
+        """Returns the sentences of the i-th document."""
+        start, end = self.doc_range(i)
+
+        return [self.sentence(j, pos) for j in range(start, end)]
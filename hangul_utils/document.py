@@ -0,0 +1,486 @@
+__all__ = ["Document", "TokenBatch"]
+
+import sys
+import array
+import bisect
+import threading
+
+# Interned pos tags of `TokenBatch`es: tag ids index `_TAGS`.
+_TAGS = []
+_TAG_IDS = {}
+_TAGS_LOCK = threading.Lock()
+
+
+def tag_id(pos):
+    """Returns the id of a pos tag in the interned tag table, adding it if
+    needed."""
+    i = _TAG_IDS.get(pos)
+
+    if i is None:
+        with _TAGS_LOCK:
+            i = _TAG_IDS.get(pos)
+
+            if i is None:
+                i = len(_TAGS)
+                _TAGS.append(sys.intern(pos))
+                # published only once the tag can be looked up
+                _TAG_IDS[pos] = i
+
+    return i
+
+
+def iter_morph_spans(text, morphs):
+    """Aligns morphemes to character offsets of the text. Surfaces that
+    cannot be found are given empty spans at the current offset.
+
+    Arguments:
+        text: the parsed text string.
+        morphs: iterable of (morpheme, pos) tuples.
+
+    Returns:
+        Generator of (start, end, pos) tuples.
+    """
+    index = 0
+
+    for f, pos in morphs:
+        start = text.find(f, index)
+
+        if start < 0:
+            yield index, index, pos
+        else:
+            index = start + len(f)
+            yield start, index, pos
+
+
+def iter_sents(text, morph_spans):
+    """Groups morphemes into sentences, which end with an `SF` morpheme.
+
+    Arguments:
+        text: the parsed text string.
+        morph_spans: iterable of (start, end, pos) tuples.
+
+    Returns:
+        Generator of (start, end, first, last, complete) tuples, where
+        start and end are the character offsets of the sentence (without
+        surrounding spaces), first and last + 1 delimit its morphemes and
+        complete tells whether it ends with `SF`.
+    """
+    first = 0
+    offset = 0
+    i = 0
+
+    for i, (_, end, pos) in enumerate(morph_spans, 1):
+        if pos == "SF":
+            yield _lstrip(text, offset, end), end, first, i, True
+            first = i
+            offset = end
+
+    if first < i:
+        end = _rstrip(text, offset, len(text))
+        yield _lstrip(text, offset, end), end, first, i, False
+
+
+def iter_word_spans(text, morph_spans):
+    """Splits space-separated tokens further at symbol (`S*`) morphemes.
+
+    Arguments:
+        text: the parsed text string.
+        morph_spans: iterable of (start, end, pos) tuples.
+
+    Returns:
+        Generator of (start, end) tuples.
+    """
+    morph_spans = iter(morph_spans)
+    morph = next(morph_spans, None)
+    cuts = []
+    n = len(text)
+    i = 0
+
+    while i < n:
+        if text[i].isspace():
+            i += 1
+            continue
+
+        start = i
+        while i < n and not text[i].isspace():
+            i += 1
+
+        del cuts[:]
+        while morph is not None and morph[0] < i:
+            if morph[2].startswith("S"):
+                cuts.append(morph[0])
+                cuts.append(morph[1])
+            morph = next(morph_spans, None)
+
+        cuts.append(i)
+        prev = start
+        for cut in cuts:
+            if prev < cut <= i:
+                yield prev, cut
+                prev = cut
+
+
+def iter_word_sents(text, word_spans, morph_spans):
+    """Groups words into sentences like `sent_word_tokenize` always has: a
+    sentence ends with the space-separated token that contains an `SF`
+    morpheme, so that "?!", "..." or "!!" end a single sentence.
+
+    Arguments:
+        text: the parsed text string.
+        word_spans: list of (start, end) tuples of the words.
+        morph_spans: iterable of (start, end, pos) tuples.
+
+    Returns:
+        Generator of (first, last, complete) tuples, where first and last + 1
+        delimit the words of a sentence and complete tells whether it ends
+        with `SF`.
+    """
+    sf_starts = iter([s for s, _, pos in morph_spans if pos == "SF"])
+    sf = next(sf_starts, None)
+    n = len(word_spans)
+    first = 0
+    token_start = None
+    complete = False
+
+    for k, (start, end) in enumerate(word_spans):
+        if token_start is None:
+            token_start = start
+
+        while sf is not None and sf < end:
+            complete = complete or sf >= token_start
+            sf = next(sf_starts, None)
+
+        # words of a token are contiguous; the next word starts a new one
+        if k + 1 < n and word_spans[k + 1][0] == end:
+            continue
+
+        token_start = None
+
+        if complete:
+            yield first, k + 1, True
+            first = k + 1
+            complete = False
+
+    if first < n:
+        yield first, n, False
+
+
+def _lstrip(text, start, end):
+    while start < end and text[start].isspace():
+        start += 1
+    return start
+
+
+def _rstrip(text, start, end):
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return end
+
+
+def _group(spans, sent_spans):
+    """Assigns sorted spans to the sentences they start in. Returns (first,
+    last + 1) index ranges into `spans` for every sentence."""
+    starts = [s for s, _ in spans]
+    return [(bisect.bisect_left(starts, s), bisect.bisect_left(starts, e))
+            for s, e in sent_spans]
+
+
+class Document(object):
+    """The analysis of a text by a single MeCab parse.
+
+    Sentence, word and morpheme views are exposed as character offset spans
+    into `text` and are built only when first accessed. Sentences and words
+    are derived from the same morphemes, so they are always consistent with
+    each other.
+
+    Arguments:
+        text: the analyzed text string.
+        morphs: iterable of (morpheme, pos) tuples produced by MeCab.
+    """
+
+    def __init__(self, text, morphs):
+        self.text = text
+        self._forms = []
+        self._tags = []
+
+        for form, pos in morphs:
+            self._forms.append(form)
+            self._tags.append(sys.intern(pos))
+
+        self._aligned_spans = None
+        self._morph_spans = None
+        self._sent_spans = None
+        self._sent_morph_ranges = None
+        self._residual = False
+        self._word_spans = None
+        self._sent_word_ranges = None
+        self._word_residual = False
+
+    def __len__(self):
+        return len(self._tags)
+
+    @property
+    def pos_tags(self):
+        """List of interned part-of-speech tags of the morphemes."""
+        return self._tags
+
+    @property
+    def _aligned(self):
+        if self._aligned_spans is None:
+            self._aligned_spans = list(iter_morph_spans(
+                self.text, zip(self._forms, self._tags)
+            ))
+
+        return self._aligned_spans
+
+    @property
+    def morph_spans(self):
+        """List of (start, end) offsets of the morphemes."""
+        if self._morph_spans is None:
+            self._morph_spans = [(s, e) for s, e, _ in self._aligned]
+
+        return self._morph_spans
+
+    @property
+    def sent_spans(self):
+        """List of (start, end) offsets of the sentences, including an
+        incomplete sentence at the end of the text."""
+        if self._sent_spans is None:
+            sents = list(iter_sents(self.text, self._aligned))
+            self._sent_spans = [(s, e) for s, e, _, _, _ in sents]
+            self._sent_morph_ranges = [(i, j) for _, _, i, j, _ in sents]
+            self._residual = bool(sents) and not sents[-1][4]
+
+        return self._sent_spans
+
+    @property
+    def sent_morph_ranges(self):
+        """List of (first, last + 1) morpheme index ranges of the
+        sentences."""
+        if self._sent_morph_ranges is None:
+            _ = self.sent_spans
+
+        return self._sent_morph_ranges
+
+    @property
+    def residual(self):
+        """Whether the last sentence is incomplete (does not end with `SF`)."""
+        _ = self.sent_spans
+
+        return self._residual
+
+    @property
+    def word_spans(self):
+        """List of (start, end) offsets of the words."""
+        if self._word_spans is None:
+            self._word_spans = list(iter_word_spans(self.text,
+                                                    self._aligned))
+
+        return self._word_spans
+
+    @property
+    def sent_word_ranges(self):
+        """List of (first, last + 1) word index ranges of the sentences of
+        `sent_words`, which end with whole space-separated tokens."""
+        if self._sent_word_ranges is None:
+            sents = list(iter_word_sents(self.text, self.word_spans,
+                                         self._aligned))
+            self._sent_word_ranges = [(i, j) for i, j, _ in sents]
+            self._word_residual = bool(sents) and not sents[-1][2]
+
+        return self._sent_word_ranges
+
+    def _num_sents(self, residual):
+        n = len(self.sent_spans)
+
+        if not residual and self.residual:
+            n -= 1
+
+        return n
+
+    def _morphs(self, first, last, pos):
+        if pos:
+            return list(zip(self._forms[first:last], self._tags[first:last]))
+
+        return self._forms[first:last]
+
+    def sentences(self, residual=True):
+        """List of sentence strings."""
+        return [self.text[s:e]
+                for s, e in self.sent_spans[:self._num_sents(residual)]]
+
+    def words(self):
+        """List of word strings."""
+        return [self.text[s:e] for s, e in self.word_spans]
+
+    def morphs(self, pos=False):
+        """List of morphemes, or morpheme and pos tuples if pos is True."""
+        return self._morphs(0, len(self._tags), pos)
+
+    def sent_words(self, residual=True):
+        """List of word lists, one for each sentence. Unlike `sentences`,
+        a sentence ends only after the whole space-separated token with its
+        `SF` morpheme, as in `sent_word_tokenize`."""
+        words = self.words()
+        ranges = self.sent_word_ranges
+
+        if not residual and self._word_residual:
+            ranges = ranges[:-1]
+
+        return [words[i:j] for i, j in ranges]
+
+    def sentence_words(self):
+        """List of word lists, one for each of the `sentences`, with the
+        words grouped by the sentence they start in."""
+        words = self.words()
+
+        return [words[i:j] for i, j in _group(self.word_spans,
+                                                self.sent_spans)]
+
+    def sent_morphs(self, residual=True, pos=False):
+        """List of morpheme lists, one for each sentence."""
+        return [self._morphs(i, j, pos) for i, j in
+                self.sent_morph_ranges[:self._num_sents(residual)]]
+
+
+class TokenBatch(object):
+    """Morphemes of a text in a compact, columnar form.
+
+    Instead of a string pair and a tuple per morpheme, a batch keeps the
+    source text, start and end offsets of the morphemes in `array('i')`s,
+    pos tags as ids into a process-wide interned tag table, and the end of
+    every sentence as a morpheme index. Morpheme strings and tuples are
+    created only when accessed.
+
+    Arguments:
+        text: the analyzed text string.
+        morphs: iterable of (morpheme, pos) tuples produced by MeCab.
+    """
+
+    def __init__(self, text, morphs=()):
+        self.text = text
+        self.starts = array.array("i")
+        self.ends = array.array("i")
+        self.tag_ids = array.array("H")
+        self.sent_ends = array.array("i")
+        # morphemes that could not be aligned to the text, by index
+        self._unaligned = None
+        index = 0
+        sf = tag_id("SF")
+
+        for i, (form, pos) in enumerate(morphs):
+            start = text.find(form, index)
+
+            if start < 0:
+                if self._unaligned is None:
+                    self._unaligned = {}
+                self._unaligned[i] = form
+                start = index
+            else:
+                index = start + len(form)
+
+            t = tag_id(pos)
+            self.starts.append(start)
+            self.ends.append(index)
+            self.tag_ids.append(t)
+
+            if t == sf:
+                self.sent_ends.append(i + 1)
+
+        if self.residual:
+            self.sent_ends.append(len(self.tag_ids))
+
+    def __getstate__(self):
+        # tag ids differ between processes; store the tags they stand for
+        return {"text": self.text, "starts": self.starts, "ends": self.ends,
+                "tags": [_TAGS[i] for i in sorted(set(self.tag_ids))],
+                "tag_ids": self.tag_ids, "sent_ends": self.sent_ends,
+                "unaligned": self._unaligned}
+
+    def __setstate__(self, state):
+        ids = sorted(set(state["tag_ids"]))
+        mapping = dict(zip(ids, map(tag_id, state["tags"])))
+        self.text = state["text"]
+        self.starts = state["starts"]
+        self.ends = state["ends"]
+        self.tag_ids = array.array("H", [mapping[i]
+                                         for i in state["tag_ids"]])
+        self.sent_ends = state["sent_ends"]
+        self._unaligned = state["unaligned"]
+
+    def __len__(self):
+        return len(self.tag_ids)
+
+    def __getitem__(self, i):
+        return self.form(i), _TAGS[self.tag_ids[i]]
+
+    def __iter__(self):
+        return iter(self.morphs(pos=True))
+
+    def __eq__(self, other):
+        if not isinstance(other, TokenBatch):
+            return NotImplemented
+
+        return self.morphs(pos=True) == other.morphs(pos=True) and \
+            self.sent_ends == other.sent_ends
+
+    @property
+    def residual(self):
+        """Whether the text ends with an incomplete sentence (morphemes
+        after the last `SF` morpheme)."""
+        return len(self.tag_ids) > 0 and self.tag_ids[-1] != tag_id("SF")
+
+    @property
+    def nbytes(self):
+        """Size of the offset, tag and sentence arrays in bytes."""
+        return sum(a.itemsize * len(a) for a in (self.starts, self.ends,
+                                                 self.tag_ids, self.sent_ends))
+
+    def form(self, i):
+        """Returns the i-th morpheme string."""
+        if self._unaligned is not None and i in self._unaligned:
+            return self._unaligned[i]
+
+        return self.text[self.starts[i]:self.ends[i]]
+
+    def _morphs(self, first, last, pos):
+        text = self.text
+
+        if self._unaligned is None:
+            forms = [text[s:e] for s, e in zip(self.starts[first:last],
+                                               self.ends[first:last])]
+        else:
+            forms = [self.form(i) for i in range(first, last)]
+
+        if pos:
+            return list(zip(forms, self._tags(first, last)))
+
+        return forms
+
+    def _tags(self, first, last):
+        tags = _TAGS
+        return [tags[t] for t in self.tag_ids[first:last]]
+
+    @property
+    def pos_tags(self):
+        """List of interned pos tags of the morphemes."""
+        return self._tags(0, len(self.tag_ids))
+
+    def morphs(self, pos=False):
+        """List of morphemes, or morpheme and pos tuples if pos is True."""
+        return self._morphs(0, len(self.tag_ids), pos)
+
+    def sent_ranges(self, residual=True):
+        """List of (first, last + 1) morpheme index ranges of the
+        sentences."""
+        ends = self.sent_ends
+
+        if not residual and self.residual:
+            ends = ends[:-1]
+
+        return list(zip([0] + list(ends[:-1]), ends))
+
+    def sent_morphs(self, residual=True, pos=False):
+        """List of morpheme lists, one for each sentence."""
+        return [self._morphs(i, j, pos)
+                for i, j in self.sent_ranges(residual)]
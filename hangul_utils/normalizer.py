@@ -0,0 +1,168 @@
+__all__ = ["NormalizerServer", "NormalizerClient"]
+
+import os
+import time
+import shutil
+import tempfile
+import threading
+import multiprocessing
+import multiprocessing.connection
+
+from .preprocess import Preprocessor, join_normalize
+
+
+def _normalize_batch(normalizer, texts):
+    if hasattr(normalizer, "normalize_batch"):
+        return normalizer.normalize_batch(texts)
+
+    return join_normalize(normalizer.normalize, texts)
+
+
+def _handle(conn, normalizer, lock):
+    with conn:
+        while True:
+            try:
+                texts = conn.recv()
+            except EOFError:
+                break
+
+            try:
+                with lock:
+                    result = None, _normalize_batch(normalizer, texts)
+            except Exception as e:
+                result = f"{type(e).__name__}: {e}", None
+
+            conn.send(result)
+
+
+def _serve(address, authkey, factory, ready):
+    normalizer = factory()
+    # start the JVM (or whatever the normalizer needs) before accepting work
+    _normalize_batch(normalizer, ["워밍업"])
+    lock = threading.Lock()
+
+    with multiprocessing.connection.Listener(address,
+                                             authkey=authkey) as listener:
+        ready.set()
+
+        while True:
+            conn = listener.accept()
+            threading.Thread(target=_handle, args=(conn, normalizer, lock),
+                             daemon=True).start()
+
+
+class NormalizerServer(object):
+    """Runs a normalizer in a dedicated process that keeps it (and the JVM
+    behind open-korean-text) warm, and serves batches of texts over a local
+    socket.
+
+    Worker processes share the server through `NormalizerClient`s instead of
+    each starting a JVM, which cannot be forked safely. The server process is
+    spawned rather than forked for the same reason.
+
+    Arguments:
+        factory: picklable callable that creates the normalizer, an object
+            with a `normalize_batch(texts)` or `normalize(text)` method.
+            Defaults to `Preprocessor`.
+        timeout: seconds to wait for the server to start.
+    """
+
+    def __init__(self, factory=Preprocessor, timeout=120):
+        self.factory = factory
+        self.timeout = timeout
+        self._dir = None
+        self._process = None
+        self.address = None
+        self.authkey = os.urandom(16)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def start(self):
+        ctx = multiprocessing.get_context("spawn")
+        ready = ctx.Event()
+        self._dir = tempfile.mkdtemp(prefix="hangul-utils-")
+        self.address = os.path.join(self._dir, "normalizer.sock")
+        self._process = ctx.Process(
+            target=_serve, args=(self.address, self.authkey, self.factory,
+                                 ready),
+            daemon=True
+        )
+        self._process.start()
+        deadline = time.monotonic() + self.timeout
+
+        while not ready.wait(0.1):
+            if not self._process.is_alive() or time.monotonic() > deadline:
+                self.close()
+                raise RuntimeError("normalizer server did not start")
+
+    def client(self):
+        """Returns a client of this server, which can be pickled and sent
+        to other processes."""
+        return NormalizerClient(self.address, self.authkey)
+
+    def close(self):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+        if self._dir is not None:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = None
+
+
+class NormalizerClient(object):
+    """A client of a `NormalizerServer`, with a connection per thread.
+
+    Arguments:
+        address: the socket address of the server.
+        authkey: the authentication key of the server.
+    """
+
+    def __init__(self, address, authkey):
+        self.address = address
+        self.authkey = authkey
+        self._local = threading.local()
+
+    def __getstate__(self):
+        # connections are made again after unpickling
+        return {"address": self.address, "authkey": self.authkey}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+
+        if conn is None:
+            conn = self._local.conn = multiprocessing.connection.Client(
+                self.address, authkey=self.authkey
+            )
+
+        return conn
+
+    def normalize_batch(self, texts):
+        """Normalizes a list of texts with a single request."""
+        conn = self._connection()
+        conn.send(list(texts))
+        error, result = conn.recv()
+
+        if error is not None:
+            raise RuntimeError(f"normalizer server failed: {error}")
+
+        return result
+
+    def normalize(self, text):
+        return self.normalize_batch([text])[0]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,86 @@
+import itertools
+import collections
+
+
+def chunked(iterable, size):
+    """Splits an iterable into lists of at most `size` items."""
+    it = iter(iterable)
+
+    while True:
+        chunk = list(itertools.islice(it, size))
+
+        if not chunk:
+            break
+
+        yield chunk
+
+
+def imap_ordered(pool, func, iterable, max_pending):
+    """Applies `func` to the items of `iterable` on a process or thread pool
+    and yields the results in input order.
+
+    Unlike `Pool.imap`, at most `max_pending` items are submitted ahead of
+    the results being consumed, so the input is read no faster than it is
+    processed.
+
+    Arguments:
+        pool: a `multiprocessing.Pool` or `multiprocessing.pool.ThreadPool`.
+        func: a picklable function taking one item.
+        iterable: iterable of (picklable) items, e.g. chunks of texts.
+        max_pending: maximum number of submitted items without consumed
+            results.
+
+    Returns:
+        Generator of results.
+    """
+    pending = collections.deque()
+
+    for item in iterable:
+        pending.append(pool.apply_async(func, (item,)))
+
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+
+    while pending:
+        yield pending.popleft().get()
+
+
+# Fields of /proc/<pid>/smaps_rollup summed into `process_memory` results.
+_SMAPS_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Shared_Clean": "shared",
+    "Shared_Dirty": "shared",
+    "Private_Clean": "private",
+    "Private_Dirty": "private"
+}
+
+
+def process_memory(pid=None):
+    """Returns the memory usage of a process in bytes, read from
+    /proc/<pid>/smaps_rollup (Linux 4.14+).
+
+    Arguments:
+        pid: process id; the current process by default.
+
+    Returns:
+        A dict of the resident set size ("rss"), the proportional set size
+        ("pss"), which divides each shared page between the processes
+        sharing it, and the shared and private parts of the resident set
+        ("shared", "private"), or None if the information is not available.
+    """
+    path = f"/proc/{'self' if pid is None else pid}/smaps_rollup"
+    usage = dict.fromkeys(("rss", "pss", "shared", "private"), 0)
+
+    try:
+        with open(path) as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                key = _SMAPS_FIELDS.get(name)
+
+                if key is not None:
+                    usage[key] += int(value.split()[0]) * 1024
+    except OSError:
+        return None
+
+    return usage
@@ -1,9 +1,84 @@
 __all__ = ["Preprocessor", "normalize", "word_tokenize", "sent_tokenize",
-           "morph_tokenize", "sent_word_tokenize", "sent_morph_tokenize"]
-
+           "morph_tokenize", "sent_word_tokenize", "sent_morph_tokenize",
+           "analyze", "morph_spans", "word_spans", "sent_spans",
+           "sent_tokenize_stream", "sent_word_tokenize_stream",
+           "morph_features", "MorphFeatures", "normalize_batch",
+           "needs_normalization"]
+
+import os
+import re
+import pickle
+import warnings
 import functools
+import threading
+import multiprocessing
+import multiprocessing.pool
+
+from .unicode import CHAR_INITIALS, CHAR_MEDIALS, CHAR_FINALS
+from .parallel import chunked, imap_ordered
+from .document import Document, TokenBatch, iter_morph_spans, iter_sents, \
+    iter_word_spans
+
+MECAB_DIC_PATH = "/usr/local/lib/mecab/dic/mecab-ko-dic"
+
+# Separates morphemes and tags in cached parses. MeCab never emits it.
+_SEP = "\x1f"
+
+# Lines of `Tagger.parse` output: the stripped surface and the pos tag, or the
+# whole feature string. The trailing "EOS" line has no tab.
+_PARSE_REGEX = re.compile(r"^[^\S\t\n]*([^\t\n]*?)[^\S\t\n]*\t([^,\n]*)",
+                          re.M)
+_PARSE_FEATURES_REGEX = re.compile(
+    r"^[^\S\t\n]*([^\t\n]*?)[^\S\t\n]*\t([^\n]*)", re.M
+)
+
+# Tasks available to `Preprocessor.pipe`: method name and default arguments.
+PIPE_TASKS = {
+    "morph": ("morph_tokenize", {}),
+    "pos": ("morph_tokenize", {"pos": True}),
+    "word": ("word_tokenize", {}),
+    "sent": ("sent_tokenize", {}),
+    "sent_word": ("sent_word_tokenize", {}),
+    "sent_morph": ("sent_morph_tokenize", {}),
+    "normalize": ("normalize", {})
+}
+
+
+def _syllables(initials=CHAR_INITIALS, finals=CHAR_FINALS):
+    """Returns the syllables with the given initials and finals (None for
+    no final) as a string."""
+    return "".join(
+        chr(0xac00 + (CHAR_INITIALS.index(init) * 21 + j) * 28 +
+            (0 if final is None else CHAR_FINALS.index(final) + 1))
+        for init in initials
+        for j in range(len(CHAR_MEDIALS))
+        for final in finals
+    )
+
+
+# Text that open-korean-text may rewrite: compatibility jamos (ㅋㅋ, ㅠㅠ,
+# 안녕ㅋ), Hangul units or symbols repeated three times or more (하하하하,
+# !!!), elongated vowels (우와아아), the typo forms it corrects (작간데 for
+# 작은데, 햇는데 for 했는데) and blank lines. Anything else is returned
+# unchanged.
+_NORMALIZE_REGEX = re.compile("|".join([
+    "[{}-{}]".format(CHAR_INITIALS[0], CHAR_MEDIALS[-1]),
+    r"([\uac00-\ud7a3]{1,4}?|[^\w\s])\1{2,}",
+    "([{}])\\2".format(_syllables(initials="ㅇ", finals=[None])),
+    "[{}][데지가]".format(_syllables(finals="ㄴ")),
+    "[{}][는다어지]".format(_syllables(finals="ㅅ")),
+    r"\n[^\S\n]*\n"
+]))
+
+# Morphemes that must follow a sentence in a streaming window before its
+# boundary is final, and that are parsed again before the next window as its
+# left context.
+_STREAM_LOOKAHEAD = 16
+_STREAM_CONTEXT = 16
 
 _preprocessor = None
+_worker_preprocessor = None
+_inherited_cache = None
 
 
 class _Mecab(object):
@@ -20,6 +95,17 @@ class _Mecab(object):
         ))
 
     def parse(self, text):
+        """Parses a text with a single MeCab call. Returns a list of
+        (morpheme, pos) tuples."""
+        return _PARSE_REGEX.findall(self._tagger.parse(text))
+
+    def parse_features(self, text):
+        """Returns a list of (morpheme, feature string) tuples."""
+        return _PARSE_FEATURES_REGEX.findall(self._tagger.parse(text))
+
+    def parse_nodes(self, text):
+        """Walks the MeCab nodes of a text. Equivalent to `parse`, but
+        slower."""
         nodes = self._tagger.parseToNode(text)
 
         while nodes:
@@ -33,22 +119,239 @@ class _Mecab(object):
             yield form, pos
 
 
-class Preprocessor(object):
-    def __init__(self):
-        self._mecab = None
-        self._twitter = None
+def join_normalize(normalize, texts):
+    """Normalizes a list of texts with a single call of `normalize` on the
+    texts joined by new lines. Empty texts and texts with new lines, which
+    the normalizer may merge, are normalized separately, as are all texts if
+    the result does not split back into as many texts."""
+    results = [None] * len(texts)
+    joined = [i for i, text in enumerate(texts) if text and "\n" not in text]
+
+    if len(joined) > 1:
+        normalized = normalize("\n".join(texts[i] for i in joined))
+        normalized = normalized.split("\n")
+
+        if len(normalized) == len(joined):
+            for i, result in zip(joined, normalized):
+                results[i] = result
+
+    return [normalize(text) if result is None else result
+            for text, result in zip(texts, results)]
+
+
+class MorphFeatures(object):
+    """The mecab-ko-dic features of a morpheme, decoded when first accessed.
+
+    Attributes:
+        raw: the comma-separated feature string.
+        pos: part-of-speech tag, e.g. "VV+EP".
+        semantic: semantic class, or None.
+        has_final: whether the last syllable has a final consonant, or None.
+        reading: reading of the morpheme, or None.
+        type: "Inflect", "Compound" or "Preanalysis", or None.
+        start_pos: first tag of an analyzed morpheme, or None.
+        end_pos: last tag of an analyzed morpheme, or None.
+        expression: list of (morpheme, pos) tuples that an analyzed morpheme
+            consists of; empty for simple morphemes.
+    """
+
+    __slots__ = ("raw", "_fields")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self._fields = None
+
+    def __repr__(self):
+        return f"MorphFeatures({self.raw!r})"
+
+    def _field(self, i):
+        if self._fields is None:
+            fields = self.raw.split(",")
+            fields += ["*"] * (8 - len(fields))
+            self._fields = fields
+
+        field = self._fields[i]
+
+        return None if field == "*" else field
+
+    @property
+    def pos(self):
+        return self.raw.split(",", 1)[0]
+
+    @property
+    def semantic(self):
+        return self._field(1)
+
+    @property
+    def has_final(self):
+        final = self._field(2)
+
+        return None if final is None else final == "T"
+
+    @property
+    def reading(self):
+        return self._field(3)
+
+    @property
+    def type(self):
+        return self._field(4)
+
+    @property
+    def start_pos(self):
+        return self._field(5)
+
+    @property
+    def end_pos(self):
+        return self._field(6)
+
+    @property
+    def expression(self):
+        expression = self._field(7)
+
+        if expression is None:
+            return []
+
+        return [tuple(m.rsplit("/", 2)[:2]) for m in expression.split("+")]
+
+
+class _MecabPool(object):
+    """A lazily populated pool of warmed-up MeCab taggers, one per thread.
 
-    def _init_mecab(self):
-        self._mecab = _Mecab("/usr/local/lib/mecab/dic/mecab-ko-dic")
+    MeCab taggers are not safe to share between threads, and building one
+    loads the whole dictionary, so each thread builds its tagger once and
+    reuses it for the lifetime of the pool.
+    """
+
+    def __init__(self, dic_path):
+        self._dic_path = dic_path
+        self._local = threading.local()
+
+    def __getstate__(self):
+        # taggers cannot be pickled; they are rebuilt lazily after unpickling
+        return {"dic_path": self._dic_path}
+
+    def __setstate__(self, state):
+        self.__init__(state["dic_path"])
+
+    def _create(self):
+        mecab = _Mecab(self._dic_path)
 
         # Run a test to sacrifice two words
         # There is a bug in mecab that makes it omit first two words.
         try:
-            _ = list(self._mecab.parse("mecab mecab"))
+            _ = list(mecab.parse("mecab mecab"))
             del _
         except UnicodeDecodeError:
             pass
 
+        return mecab
+
+    def get(self):
+        """Returns the tagger of the calling thread, building it if needed."""
+        mecab = getattr(self._local, "mecab", None)
+
+        if mecab is None:
+            mecab = self._local.mecab = self._create()
+
+        return mecab
+
+
+def needs_normalization(text):
+    """Checks cheaply whether open-korean-text could change a text.
+
+    The check is conservative: it may flag text that normalizes to itself,
+    but text that is not flagged is expected to be returned unchanged.
+    """
+    return _NORMALIZE_REGEX.search(text) is not None
+
+
+def _dic_version(dic_path):
+    """Identifies a MeCab dictionary by its path and the size and
+    modification time of its system dictionary."""
+    try:
+        stat = os.stat(os.path.join(dic_path, "sys.dic"))
+    except OSError:
+        return dic_path
+    return f"{dic_path}:{stat.st_size}:{int(stat.st_mtime)}"
+
+
+def _pack_morphs(morphs):
+    """Packs (morpheme, pos) tuples into two strings for caching."""
+    if not morphs:
+        return None
+    forms, tags = zip(*morphs)
+    return _SEP.join(forms), _SEP.join(tags)
+
+
+def _unpack_morphs(packed):
+    if packed is None:
+        return []
+    forms, tags = packed
+    return list(zip(forms.split(_SEP), tags.split(_SEP)))
+
+
+class Preprocessor(object):
+    """Korean text preprocessor.
+
+    Arguments:
+        dic_path: path to the mecab-ko-dic dictionary.
+        cache: an optional cache (`LRUCache` or `DiskCache`) for MeCab
+            parses and normalized texts, keyed by the input text and the
+            dictionary. Parses are stored in a packed form of two strings
+            rather than lists of tuples.
+        normalizer: an optional object with a `normalize_batch` method to
+            normalize texts with instead of open-korean-text in this
+            process, e.g. a `NormalizerClient`.
+        precheck: whether to return texts that `needs_normalization`
+            rejects as they are, without calling the normalizer. Off by
+            default, so that every text is normalized. If "strict", such
+            texts are normalized anyway and a warning is issued when the
+            result differs. The numbers of skipped texts (none in strict
+            mode) and of mismatches are counted in `normalize_skipped` and
+            `normalize_mismatches`.
+    """
+
+    def __init__(self, dic_path=MECAB_DIC_PATH, cache=None, normalizer=None,
+                 precheck=False):
+        if precheck not in (True, False, "strict"):
+            raise ValueError(f"unsupported precheck: {precheck!r}; must be "
+                             f"True, False or 'strict'")
+
+        self._dic_path = dic_path
+        self._mecab_pool = _MecabPool(dic_path)
+        self._twitter = None
+        self._normalizer = normalizer
+        self.precheck = precheck
+        self.normalize_skipped = 0
+        self.normalize_mismatches = 0
+        self._cache = cache
+        self._cache_key = ("parse", _dic_version(dic_path))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # the JVM-backed normalizer is created again when needed
+        state["_twitter"] = None
+        return state
+
+    @property
+    def _mecab(self):
+        return self._mecab_pool.get()
+
+    def _parse(self, text):
+        if self._cache is None:
+            return self._mecab.parse(text)
+
+        key = self._cache_key + (text,)
+        packed = self._cache.get(key, key)
+
+        if packed is key:
+            morphs = list(self._mecab.parse(text))
+            self._cache.put(key, _pack_morphs(morphs))
+        else:
+            morphs = _unpack_morphs(packed)
+
+        return morphs
+
     def _init_twitter(self):
         try:
             import twkorean
@@ -67,70 +370,173 @@ class Preprocessor(object):
         Returns:
             Normalized text string.
         """
+        return self.normalize_batch([text])[0]
+
+    def normalize_batch(self, texts):
+        """Normalize a batch of texts using open-korean-text.
+
+        The texts are joined by new lines and normalized with a single call
+        into the JVM, instead of one call per text. With `precheck`, texts
+        that cannot change are returned without being normalized.
+
+        Arguments:
+            texts: iterable of text strings.
+
+        Returns:
+            List of normalized text strings.
+        """
+        texts = list(texts)
+
+        if not self.precheck:
+            return self._normalize_cached(texts)
+
+        results = [None] * len(texts)
+        todo = []
+
+        for i, text in enumerate(texts):
+            if needs_normalization(text):
+                todo.append(i)
+            else:
+                results[i] = text
+
+        if self.precheck == "strict":
+            todo = range(len(texts))
+        else:
+            self.normalize_skipped += len(texts) - len(todo)
+
+        normalized = self._normalize_cached([texts[i] for i in todo])
+
+        for i, result in zip(todo, normalized):
+            if results[i] is not None and results[i] != result:
+                self.normalize_mismatches += 1
+                warnings.warn(f"normalization precheck skipped a text that "
+                              f"changes: {texts[i]!r} -> {result!r}")
+
+            results[i] = result
+
+        return results
+
+    def _normalize_cached(self, texts):
+        if self._cache is None:
+            return self._normalize_batch(texts)
+
+        keys = [("normalize", text) for text in texts]
+        results = [self._cache.get(key) for key in keys]
+        misses = [i for i, result in enumerate(results) if result is None]
+        normalized = self._normalize_batch([texts[i] for i in misses])
+
+        for i, result in zip(misses, normalized):
+            results[i] = result
+            self._cache.put(keys[i], result)
+
+        return results
+
+    def _normalize_batch(self, texts):
+        if not texts:
+            return []
+
+        if self._normalizer is not None:
+            return self._normalizer.normalize_batch(texts)
+
         if self._twitter is None:
             self._init_twitter()
 
-        return self._twitter.normalize(text)
+        return join_normalize(self._twitter.normalize, texts)
+
+    def analyze(self, text):
+        """Analyze a text with a single MeCab parse.
+
+        Sentences, words and morphemes (with pos tags) can all be obtained
+        from the returned document without parsing the text again.
 
-    def word_tokenize(self, text):
-        """Tokenize a text into space-separated words.
-          
-        This is the most basic form of tokenization, where we do not wish to
-        analyze morphology of each individual word. 
-        
         Arguments:
             text: text string.
-            
+
         Returns:
-            Generator for a list of space-tokenized words.
+            A `Document` of the text.
         """
-        if self._mecab is None:
-            self._init_mecab()
+        return Document(text, self._parse(text))
 
-        tokens = text.split()
-        tokens_it = iter(tokens)
+    def morph_features(self, text):
+        """Tokenize a text into morphemes with all of their dictionary
+        features (using Mecab-ko).
 
-        try:
-            token = next(tokens_it)
-            index = 0
+        Features beyond the pos tag are decoded only when accessed.
 
-            for f, pos in self._mecab.parse(text):
+        Arguments:
+            text: text string.
 
-                if index >= len(token):
-                    if token:
-                        yield token
+        Returns:
+            Generator of (morpheme, `MorphFeatures`) tuples.
+        """
+        for form, features in self._mecab.parse_features(text):
+            yield form, MorphFeatures(features)
 
-                    token = next(tokens_it)
-                    index = 0
+    def morph_spans(self, text, pos=False):
+        """Tokenize a text into morpheme offsets (using Mecab-ko).
 
-                # token_f = token[index:index + len(f)]
-                # if token_f != f:
-                #     print(token, index, token_f, f)
+        Arguments:
+            text: text string.
+            pos: whether to include part-of-speech tags.
 
-                if pos.startswith("S"):
-                    if index:
-                        t, token = token[:index], token[index:]
+        Returns:
+            If pos is False, then a generator of (start, end) offsets of the
+            morphemes in the text is returned. Otherwise, a generator of
+            offsets and pos tuples is returned.
+        """
+        for start, end, p in iter_morph_spans(text, self._parse(text)):
+            if pos:
+                yield (start, end), p
+            else:
+                yield start, end
 
-                        if t:
-                            yield t
+    def word_spans(self, text):
+        """Tokenize a text into word offsets.
 
-                        index = 0
+        Arguments:
+            text: text string.
 
-                    t, token = token[index:index + len(f)], token[
-                                                            index + len(f):]
+        Returns:
+            Generator of (start, end) offsets of the words in the text.
+        """
+        return iter_word_spans(
+            text, iter_morph_spans(text, self._parse(text))
+        )
 
-                    if t:
-                        yield t
+    def sent_spans(self, text, residual=True):
+        """Tokenize a bulk of text into sentence offsets (using Mecab-ko).
 
-                    index = 0
-                else:
-                    index += len(f)
+        The text is not copied, so this runs in linear time regardless of
+        the number of sentences.
 
-            if token and index:
-                yield token[:index]
+        Arguments:
+            text: text string.
+            residual: whether to include an incomplete sentence at the end of
+                the text.
+        Returns:
+            Generator of (start, end) offsets of the sentences in the text,
+            without surrounding spaces.
+        """
+        morphs = iter_morph_spans(text, self._parse(text))
 
-        except StopIteration:
-            pass
+        for start, end, _, _, complete in iter_sents(text, morphs):
+            if complete or residual:
+                yield start, end
+
+    def word_tokenize(self, text):
+        """Tokenize a text into space-separated words.
+          
+        This is the most basic form of tokenization, where we do not wish to
+        analyze morphology of each individual word. 
+        
+        Arguments:
+            text: text string.
+            
+        Returns:
+            Generator for a list of space-tokenized words.
+        """
+        for start, end in self.word_spans(text):
+            yield text[start:end]
 
     def sent_tokenize(self, text, residual=True):
         """Tokenize a bulk of text into list of sentences (using Mecab-ko).
@@ -143,48 +549,37 @@ class Preprocessor(object):
             Generator that generates a list of sentence strings in their 
             original forms.
         """
-        self._init_mecab()
-
-        index = 0
-
-        for f, pos in self._mecab.parse(text):
-            index = text.find(f, index)
-            index += len(f)
-
-            if pos == "SF":
-                sent = text[:index].strip()
-
-                yield sent
+        for start, end in self.sent_spans(text, residual):
+            yield text[start:end]
 
-                text = text[index:]
-                index = 0
-
-        if residual and index > 0:
-            sent = text.strip()
-
-            yield sent
-
-    def morph_tokenize(self, text, pos=False):
+    def morph_tokenize(self, text, pos=False, columnar=False):
         """Tokenize a sentence into morpheme tokens (using Mecab-ko).
         
         Arguments:
             text: sentence string.
             pos: whether to include part-of-speech tags.
+            columnar: whether to return a compact `TokenBatch` instead.
             
         Returns:
             If pos is False, then a generator of morphemes is returned. 
             Otherwise, a generator of morpheme and pos tuples is returned.
+            If columnar is True, a `TokenBatch` is returned.
         """
-        self._init_mecab()
+        if columnar:
+            return TokenBatch(text, self._parse(text))
 
+        return self._morph_tokenize(text, pos)
+
+    def _morph_tokenize(self, text, pos):
         if pos:
-            for item in self._mecab.parse(text):
+            for item in self._parse(text):
                 yield item
         else:
-            for f, _ in self._mecab.parse(text):
+            for f, _ in self._parse(text):
                 yield f
 
-    def sent_morph_tokenize(self, text, residual=True, pos=False):
+    def sent_morph_tokenize(self, text, residual=True, pos=False,
+                            columnar=False):
         """Tokenize a bulk of text into list of sentences (using Mecab-ko).
 
         Each sentence is a list of morphemes. This is slightly more efficient than
@@ -195,15 +590,28 @@ class Preprocessor(object):
             residual: whether to include an incomplete sentence at the end of
                 the text.
             pos: whether to include part-of-speech tag.
+            columnar: whether to return a compact `TokenBatch` instead, whose
+                `sent_ranges` delimit the sentences.
         Returns:
             If pos is False, then a generator of morphemes list is returned. 
             Otherwise, a generator of morpheme and pos tuples list is returned.
+            If columnar is True, a `TokenBatch` is returned.
         """
-        self._init_mecab()
+        if not columnar:
+            return self._sent_morph_tokenize(text, residual, pos)
+
+        morphs = list(self._parse(text))
+
+        if not residual:
+            while morphs and morphs[-1][1] != "SF":
+                morphs.pop()
+
+        return TokenBatch(text, morphs)
 
+    def _sent_morph_tokenize(self, text, residual, pos):
         sent = []
 
-        for f, p in self._mecab.parse(text):
+        for f, p in self._parse(text):
             if pos:
                 sent.append((f, p))
             else:
@@ -229,63 +637,265 @@ class Preprocessor(object):
         Returns:
             A generator of words list. 
         """
-        self._init_mecab()
+        for words in self.analyze(text).sent_words(residual):
+            yield words
+
+    def _stream_documents(self, source, window_size):
+        """Analyzes a stream of text in windows of about `window_size`
+        characters. Yields (document, limit) tuples: the sentences of the
+        document that end at or before the character offset `limit` are
+        final, or all of them if limit is None (the last document).
+
+        MeCab may tag a morpheme differently depending on the morphemes on
+        either side of it, so a window is cut only after an `SF` morpheme
+        that ends a space-separated token and has `_STREAM_LOOKAHEAD`
+        morphemes after it, and the next window is parsed starting
+        `_STREAM_CONTEXT` morphemes (rounded to a token) before the cut; the
+        morphemes of that left context were already final and are dropped.
+        Cutting after a whole token keeps sentences and word sentences (see
+        `Document.sent_words`) final at the same point. A window without a
+        cut keeps growing."""
+        if hasattr(source, "read"):
+            pieces = iter(functools.partial(source.read, window_size), "")
+        elif isinstance(source, str):
+            pieces = (source[i:i + window_size]
+                      for i in range(0, len(source), window_size))
+        else:
+            pieces = source
 
-        sent = []
-        tokens = text.split()
-        tokens_it = iter(tokens)
+        buffer = []
+        size = 0
+        threshold = window_size
+        # offset in the buffer after the left context, where text that is
+        # not final yet starts
+        keep = 0
 
-        try:
-            token = next(tokens_it)
-            index = 0
-            yield_sent = False
+        for piece in pieces:
+            buffer.append(piece)
+            size += len(piece)
 
-            for f, pos in self._mecab.parse(text):
+            if size < threshold:
+                continue
 
-                if index >= len(token):
-                    if token:
-                        sent.append(token)
+            buffer = "".join(buffer)
+            cut = len(buffer)
+            while cut > keep and not buffer[cut - 1].isspace():
+                cut -= 1
+            text = buffer[:cut]
+            buffer = [buffer]
+            # windows bypass the cache, which is meant for short texts
+            morphs = list(iter_morph_spans(text, self._mecab.parse(text)))
+            last = None
+
+            for i in range(len(morphs) - _STREAM_LOOKAHEAD - 1, -1, -1):
+                start, end, pos = morphs[i]
+
+                if start < keep:
+                    break
+
+                if pos == "SF" and end < cut and text[end].isspace():
+                    last = i
+                    break
+
+            if last is None:
+                # avoid reparsing the growing window for every piece
+                threshold = size * 2
+                continue
 
-                    token = next(tokens_it)
-                    index = 0
+            yield self._window_document(text, morphs, keep), \
+                morphs[last][1] - keep
+            context = morphs[max(last + 1 - _STREAM_CONTEXT, 0)][0]
+            while context > 0 and not text[context - 1].isspace():
+                context -= 1
+            keep = morphs[last][1] - context
+            buffer = [buffer[0][context:]]
+            size = len(buffer[0])
+            threshold = size + window_size
+
+        text = "".join(buffer)
+        morphs = iter_morph_spans(text, self._mecab.parse(text))
+        yield self._window_document(text, morphs, keep), None
+
+    @staticmethod
+    def _window_document(text, morphs, keep):
+        """Returns a document of the text after offset `keep`, with the
+        morphemes of a parse of the whole text that start there."""
+        return Document(text[keep:], [(text[s:e], pos)
+                                      for s, e, pos in morphs if s >= keep])
+
+    def sent_tokenize_stream(self, source, residual=True,
+                             window_size=65536):
+        """Tokenize a text stream into sentences (using Mecab-ko) in bounded
+        windows, yielding sentences as soon as they are final.
+
+        The sentences are the same as `sent_tokenize` on the whole text, but
+        memory is bounded by the window size and the longest sentence rather
+        than the length of the text.
 
-                    if yield_sent:
-                        yield sent
-                        yield_sent = False
-                        sent = []
+        Arguments:
+            source: a text file object, an iterable of text strings (e.g.
+                lines) that are concatenated, or a text string.
+            residual: whether to include an incomplete sentence at the end of
+                the text.
+            window_size: number of characters to analyze at a time.
+        Returns:
+            Generator of sentence strings.
+        """
+        for doc, limit in self._stream_documents(source, window_size):
+            if limit is None:
+                sents = doc.sentences(residual)
+            else:
+                sents = [doc.text[s:e] for s, e in doc.sent_spans
+                         if e <= limit]
 
-                # assert token[index:index + len(f)] == f
+            for sent in sents:
+                yield sent
 
-                if pos.startswith("S"):
-                    if index:
-                        t, token = token[:index], token[index:]
+    def sent_word_tokenize_stream(self, source, residual=True,
+                                  window_size=65536):
+        """Tokenize a text stream into sentences of words in bounded windows.
+        See `sent_tokenize_stream`.
 
-                        if t:
-                            sent.append(t)
+        Arguments:
+            source: a text file object, an iterable of text strings (e.g.
+                lines) that are concatenated, or a text string.
+            residual: whether to include an incomplete sentence at the end of
+                the text.
+            window_size: number of characters to analyze at a time.
+        Returns:
+            Generator of word lists.
+        """
+        for doc, limit in self._stream_documents(source, window_size):
+            if limit is None:
+                sents = doc.sent_words(residual)
+            else:
+                words = doc.words()
+                sents = [words[i:j] for i, j in doc.sent_word_ranges
+                         if doc.word_spans[j - 1][1] <= limit]
 
-                        index = 0
+            for words in sents:
+                yield words
 
-                    t, token = token[index:index + len(f)], token[
-                                                            index + len(f):]
+    def _run_task(self, task, texts, kwargs):
+        if task == "normalize":
+            return self.normalize_batch(texts)
 
-                    if t:
-                        sent.append(t)
+        name, defaults = PIPE_TASKS[task]
+        func = getattr(self, name)
+        kwargs = dict(defaults, **kwargs)
+        results = []
 
-                    index = 0
+        for text in texts:
+            result = func(text, **kwargs)
 
-                    if pos == "SF":
-                        yield_sent = True
-                else:
-                    index += len(f)
+            if not isinstance(result, (str, TokenBatch)):
+                result = list(result)
 
-            if token and index:
-                sent.append(token[:index])
+            results.append(result)
 
-            if sent and (yield_sent or residual):
-                yield sent
+        return results
 
-        except StopIteration:
-            pass
+    def pipe(self, texts, batch_size=1000, n_process=1, task="morph",
+             n_threads=1, **kwargs):
+        """Process a stream of texts, optionally on multiple processes or
+        threads.
+
+        Texts are sent to the workers in chunks of `batch_size`, and only a
+        bounded number of chunks are in flight at a time, so the input is
+        consumed no faster than it is processed. Each worker keeps its own
+        warmed-up MeCab tagger.
+
+        Worker processes are forked with the tagger of the current thread
+        already built, so that they share its memory copy-on-write (with the
+        "fork" start method). Threads avoid forking altogether, but only run
+        in parallel as far as the MeCab binding releases the GIL while
+        parsing.
+
+        Arguments:
+            texts: iterable of text strings.
+            batch_size: number of texts per chunk.
+            n_process: number of worker processes; -1 uses all CPUs and 1
+                processes the texts in the current process.
+            task: one of "morph", "pos", "word", "sent", "sent_word",
+                "sent_morph" and "normalize".
+            n_threads: number of worker threads; -1 uses all CPUs. Cannot be
+                combined with multiple processes.
+            kwargs: extra arguments to the underlying method, e.g.
+                `residual`.
+
+        Returns:
+            Generator of results in input order. Tokenization results are
+            lists instead of generators.
+        """
+        if task not in PIPE_TASKS:
+            raise ValueError(f"unsupported task: {task}; must be one of "
+                             f"{sorted(PIPE_TASKS)}")
+
+        if n_process == -1:
+            n_process = os.cpu_count() or 1
+
+        if n_threads == -1:
+            n_threads = os.cpu_count() or 1
+
+        if n_process > 1 and n_threads > 1:
+            raise ValueError("n_process and n_threads cannot both be "
+                             "greater than 1")
+
+        chunks = chunked(texts, batch_size)
+        warmup = task != "normalize"
+
+        if n_process > 1:
+            n_workers = n_process
+            # a tagger warmed up before forking is inherited by the workers,
+            # which then share its pages instead of each building their own
+            _init_thread(self, warmup)
+            pool = multiprocessing.Pool(n_process, initializer=_init_worker,
+                                        initargs=(self, warmup))
+            func = functools.partial(_run_worker_task, task, kwargs=kwargs)
+        elif n_threads > 1:
+            # taggers are per thread already; only warm them up
+            n_workers = n_threads
+            pool = multiprocessing.pool.ThreadPool(
+                n_threads, initializer=_init_thread, initargs=(self, warmup)
+            )
+            func = functools.partial(self._run_task, task, kwargs=kwargs)
+        else:
+            for chunk in chunks:
+                for result in self._run_task(task, chunk, kwargs):
+                    yield result
+            return
+
+        try:
+            for results in imap_ordered(pool, func, chunks, n_workers * 2):
+                for result in results:
+                    yield result
+        finally:
+            pool.terminate()
+            pool.join()
+
+
+def _init_worker(preprocessor, warmup=True, process=True):
+    global _worker_preprocessor, _inherited_cache
+
+    if process and preprocessor._cache is not None:
+        # a forked worker inherits the parent's cache as is, including an
+        # open database connection that must not be used across a fork; a
+        # pickled copy starts empty or reopens the database instead. The
+        # inherited one is kept so that its connection is never closed here
+        _inherited_cache = preprocessor._cache
+        preprocessor._cache = pickle.loads(pickle.dumps(preprocessor._cache))
+
+    _worker_preprocessor = preprocessor
+    _init_thread(preprocessor, warmup)
+
+
+def _init_thread(preprocessor, warmup=True):
+    if warmup:
+        _ = preprocessor._mecab
+
+
+def _run_worker_task(task, texts, kwargs):
+    return _worker_preprocessor._run_task(task, texts, kwargs)
 
 
 def normalize(text, *args, **kwargs):
@@ -342,9 +952,91 @@ def sent_morph_tokenize(text, *args, **kwargs):
     return _preprocessor.sent_morph_tokenize(text, *args, **kwargs)
 
 
+def analyze(text, *args, **kwargs):
+    global _preprocessor
+
+    if _preprocessor is None:
+        _preprocessor = Preprocessor()
+
+    return _preprocessor.analyze(text, *args, **kwargs)
+
+
+def morph_spans(text, *args, **kwargs):
+    global _preprocessor
+
+    if _preprocessor is None:
+        _preprocessor = Preprocessor()
+
+    return _preprocessor.morph_spans(text, *args, **kwargs)
+
+
+def word_spans(text, *args, **kwargs):
+    global _preprocessor
+
+    if _preprocessor is None:
+        _preprocessor = Preprocessor()
+
+    return _preprocessor.word_spans(text, *args, **kwargs)
+
+
+def sent_spans(text, *args, **kwargs):
+    global _preprocessor
+
+    if _preprocessor is None:
+        _preprocessor = Preprocessor()
+
+    return _preprocessor.sent_spans(text, *args, **kwargs)
+
+
+def normalize_batch(texts, *args, **kwargs):
+    global _preprocessor
+
+    if _preprocessor is None:
+        _preprocessor = Preprocessor()
+
+    return _preprocessor.normalize_batch(texts, *args, **kwargs)
+
+
+def morph_features(text, *args, **kwargs):
+    global _preprocessor
+
+    if _preprocessor is None:
+        _preprocessor = Preprocessor()
+
+    return _preprocessor.morph_features(text, *args, **kwargs)
+
+
+def sent_tokenize_stream(source, *args, **kwargs):
+    global _preprocessor
+
+    if _preprocessor is None:
+        _preprocessor = Preprocessor()
+
+    return _preprocessor.sent_tokenize_stream(source, *args, **kwargs)
+
+
+def sent_word_tokenize_stream(source, *args, **kwargs):
+    global _preprocessor
+
+    if _preprocessor is None:
+        _preprocessor = Preprocessor()
+
+    return _preprocessor.sent_word_tokenize_stream(source, *args, **kwargs)
+
+
 functools.update_wrapper(normalize, Preprocessor.normalize)
 functools.update_wrapper(sent_tokenize, Preprocessor.sent_tokenize)
 functools.update_wrapper(morph_tokenize, Preprocessor.morph_tokenize)
 functools.update_wrapper(word_tokenize, Preprocessor.word_tokenize)
 functools.update_wrapper(sent_word_tokenize, Preprocessor.sent_word_tokenize)
 functools.update_wrapper(sent_morph_tokenize, Preprocessor.sent_morph_tokenize)
+functools.update_wrapper(analyze, Preprocessor.analyze)
+functools.update_wrapper(morph_spans, Preprocessor.morph_spans)
+functools.update_wrapper(word_spans, Preprocessor.word_spans)
+functools.update_wrapper(sent_spans, Preprocessor.sent_spans)
+functools.update_wrapper(normalize_batch, Preprocessor.normalize_batch)
+functools.update_wrapper(morph_features, Preprocessor.morph_features)
+functools.update_wrapper(sent_tokenize_stream,
+                         Preprocessor.sent_tokenize_stream)
+functools.update_wrapper(sent_word_tokenize_stream,
+                         Preprocessor.sent_word_tokenize_stream)
@@ -1,49 +1,551 @@
+import os
 import sys
+import time
+import shutil
+import signal
 import argparse
-import itertools
+import threading
+import multiprocessing
+import multiprocessing.pool
 
 import tqdm
-import map_async
+from . import __version__
+from .cache import DiskCache
+from .corpus import CorpusWriter
+from .normalizer import NormalizerServer
+from .server import TokenizerServer
+from .parallel import chunked, imap_ordered, process_memory
 from .preprocess import *
+from .preprocess import MECAB_DIC_PATH, Preprocessor, _dic_version
 from .unicode import *
 
+# options that affect the output of `process`
+CACHED_OPTIONS = ["sentencize", "sentence_delimiter", "normalize",
+                  "normalize_strict", "delimiter", "word_tokenize",
+                  "morph_tokenize", "pos_tokenize", "split_syllables",
+                  "join_jamos"]
+
+# changes whenever the output for the same options changes
+PIPELINE_VERSION = 2
+
+_cache = None
+_args = None
+_pipeline = None
+
+
+def get_cache(args):
+    global _cache
+
+    if _cache is None:
+        max_bytes = None
+        if args.cache_size is not None:
+            max_bytes = int(args.cache_size * 1024 * 1024)
+        namespace = repr((__version__, PIPELINE_VERSION,
+                          _dic_version(MECAB_DIC_PATH),
+                          [(k, getattr(args, k)) for k in CACHED_OPTIONS]))
+        _cache = DiskCache(args.cache, max_bytes=max_bytes,
+                           namespace=namespace)
+
+    return _cache
+
 
 def process(args, text):
-    text = text.strip()
-    if args.sentencize:
-        sents = sent_tokenize(text)
-    else:
-        sents = [text]
-    new_sents = []
-    for sent in sents:
-        if args.normalize:
-            sent = normalize(sent)
-        delimiter = args.delimiter
+    return process_texts(args, [text])[0]
+
+
+def process_texts(args, texts):
+    texts = [text.strip() for text in texts]
+    if args.cache is None:
+        return _pipeline.batch(texts)
+    cache = get_cache(args)
+    results = [cache.get(text) for text in texts]
+    misses = [i for i, result in enumerate(results) if result is None]
+    for i, result in zip(misses, _pipeline.batch([texts[i] for i in misses])):
+        results[i] = result
+        cache.put(texts[i], result)
+    return results
+
+
+def init_worker(args):
+    """Stores the options and pipeline in a worker and warms up its
+    tagger."""
+    global _args, _pipeline
+
+    _args = args
+    _pipeline = Pipeline(args)
+    if (args.sentencize or args.word_tokenize or args.morph_tokenize or
+            args.pos_tokenize):
+        list(morph_tokenize(""))
+
+
+def count_tokens(result):
+    """Counts the tokens in a processed line, if it was tokenized."""
+    if _pipeline.tokens is None or not result:
+        return 0
+    delimiter = _pipeline.delimiter
+    sentence_delimiter = _pipeline.sentence_delimiter
+    n = result.count(delimiter) + 1
+    if sentence_delimiter != delimiter:
+        n += result.count(sentence_delimiter)
+    return n
+
+
+def process_lines(lines):
+    """Processes a chunk of encoded input lines. Returns the number of
+    lines, their size in bytes, the number of tokens, the number of lines
+    that skipped normalization and the encoded output."""
+    skipped = _pipeline.normalize_skipped
+    results = process_texts(_args, [line.decode("utf-8") for line in lines])
+    output = b"".join(result.encode("utf-8", "surrogatepass") + b"\n"
+                      for result in results)
+    num_tokens = sum(map(count_tokens, results))
+    return (len(lines), sum(map(len, lines)), num_tokens,
+            _pipeline.normalize_skipped - skipped, output)
+
+
+def analyze_lines(lines):
+    """Analyzes a chunk of encoded input lines for a binary corpus. Returns
+    the number of lines, their size in bytes, the number of tokens, the
+    number of lines that skipped normalization and the (tokens, pos tags)
+    sentences of every line."""
+    skipped = _pipeline.normalize_skipped
+    docs = _pipeline.analyze_batch([line.decode("utf-8").strip()
+                                    for line in lines])
+    num_tokens = sum(len(forms) for doc in docs for forms, _ in doc)
+    return (len(lines), sum(map(len, lines)), num_tokens,
+            _pipeline.normalize_skipped - skipped, docs)
+
+
+def shard_offsets(path, num_shards):
+    """Splits a file into at most `num_shards` byte ranges that start and end
+    at line boundaries. Returns a list of (start, end) offsets."""
+    size = os.path.getsize(path)
+    offsets = [0]
+    with open(path, "rb") as f:
+        for i in range(1, num_shards):
+            pos = size * i // num_shards
+            if pos <= offsets[-1]:
+                continue
+            # a boundary right after a newline stays where it is
+            f.seek(pos - 1)
+            f.readline()
+            pos = f.tell()
+            if offsets[-1] < pos < size:
+                offsets.append(pos)
+    offsets.append(size)
+    return list(zip(offsets[:-1], offsets[1:]))
+
+
+def shard_path(output_path, start, end):
+    return f"{output_path}.shard-{start}-{end}"
+
+
+def process_shard(input_path, start, end, output_path):
+    """Processes the lines in a byte range of the input file into a shard
+    output file. The output is renamed into place only when complete, so that
+    an interrupted run can be resumed by shard."""
+    tmp_path = output_path + ".tmp"
+    num_lines = 0
+    num_tokens = 0
+    num_skipped = 0
+    with open(input_path, "rb") as f, open(tmp_path, "wb") as out:
+        f.seek(start)
+        lines = iter(f.readline, b"")
+        pos = start
+
+        def shard_lines():
+            nonlocal pos
+            for line in lines:
+                yield line
+                pos += len(line)
+                if pos >= end:
+                    break
+
+        for chunk in chunked(shard_lines(), _args.chunk_size):
+            n, _, t, k, output = process_lines(chunk)
+            num_lines += n
+            num_tokens += t
+            num_skipped += k
+            out.write(output)
+    os.replace(tmp_path, output_path)
+    return num_lines, end - start, num_tokens, num_skipped
+
+
+def _process_shard(shard):
+    return process_shard(*shard)
+
+
+class Pipeline(object):
+    """The processing of a line, with its stages decided once from the
+    options.
+
+    A line is normalized first and then analyzed with a single MeCab parse,
+    from which sentences, words, morphemes and POS tags are all derived.
+    Lines are normalized in batches, through a normalizer server if the
+    options carry a client of one (`normalizer`). Lines that cannot change
+    are not normalized, unless `normalize_strict` is set to verify that.
+    Every thread normalizes with a `Preprocessor` of its own, whose counter
+    of skipped lines is `normalize_skipped`.
+    """
+
+    def __init__(self, args):
+        self.normalize = args.normalize
+        self._normalizer = getattr(args, "normalizer", None)
+        self._precheck = ("strict" if getattr(args, "normalize_strict", False)
+                          else True)
+        self._local = threading.local()
+        self.sentencize = args.sentencize
+        self.delimiter = args.delimiter
+        self.sentence_delimiter = args.sentence_delimiter
+        self.tokens = None
         if args.word_tokenize:
-            sent = delimiter.join(word_tokenize(sent))
+            self.tokens = self._words
         elif args.morph_tokenize:
-            sent = delimiter.join(morph_tokenize(sent, pos=False))
+            self.tokens = self._morphs
         elif args.pos_tokenize:
-            sent = delimiter.join(p for _, p in morph_tokenize(sent, pos=True))
+            self.tokens = self._pos_tags
+        self.convert = None
         if args.split_syllables:
-            sent = split_syllables(sent)
+            self.convert = split_syllables
         elif args.join_jamos:
-            sent = join_jamos(sent)
-        new_sents.append(sent)
-    return args.sentence_delimiter.join(new_sents)
+            self.convert = join_jamos
+
+    @property
+    def preprocessor(self):
+        """The preprocessor that normalizes lines on the current thread."""
+        preprocessor = getattr(self._local, "preprocessor", None)
+        if preprocessor is None:
+            preprocessor = self._local.preprocessor = Preprocessor(
+                normalizer=self._normalizer, precheck=self._precheck
+            )
+        return preprocessor
+
+    @property
+    def normalize_skipped(self):
+        """Number of lines the current thread has not normalized because
+        they cannot change."""
+        if not self.normalize:
+            return 0
+        return self.preprocessor.normalize_skipped
+
+    def normalize_batch(self, texts):
+        return self.preprocessor.normalize_batch(texts)
+
+    def _words(self, doc):
+        if self.sentencize:
+            return doc.sentence_words()
+        return [doc.words()]
+
+    def _morphs(self, doc):
+        if self.sentencize:
+            return doc.sent_morphs()
+        return [doc.morphs()]
+
+    def _pos_tags(self, doc):
+        if self.sentencize:
+            return [doc.pos_tags[i:j] for i, j in doc.sent_morph_ranges]
+        return [doc.pos_tags]
+
+    def analyze_batch(self, texts):
+        """Returns the sentences of each line (or the line as one sentence)
+        as (morphemes, pos tags) tuples."""
+        if self.normalize:
+            texts = self.normalize_batch(texts)
+        return [self._analyze(text) for text in texts]
+
+    def _analyze(self, text):
+        doc = analyze(text)
+        forms = doc.morphs()
+        if self.convert is not None:
+            forms = [self.convert(form) for form in forms]
+        if self.sentencize:
+            ranges = doc.sent_morph_ranges
+        else:
+            ranges = [(0, len(doc))] if len(doc) else []
+        return [(forms[i:j], doc.pos_tags[i:j]) for i, j in ranges]
+
+    def __call__(self, text):
+        return self.batch([text])[0]
+
+    def batch(self, texts):
+        """Processes a list of lines."""
+        if self.normalize:
+            texts = self.normalize_batch(texts)
+        return [self._process(text) for text in texts]
+
+    def _process(self, text):
+        if self.tokens is not None:
+            sents = [self.delimiter.join(tokens)
+                     for tokens in self.tokens(analyze(text))]
+        elif self.sentencize:
+            sents = analyze(text).sentences()
+        else:
+            sents = [text]
+        if self.convert is not None:
+            sents = [self.convert(sent) for sent in sents]
+        return self.sentence_delimiter.join(sents)
+
+
+def create_pool(args):
+    """Creates a process or thread pool of initialized workers, or
+    initializes the current process and returns None for serial
+    processing.
+
+    Unless `preload` is off, worker processes are forked from a parent that
+    has already built and warmed up its tagger, so that they inherit it and
+    share its pages copy-on-write instead of each building their own."""
+    if args.processes > 1:
+        if getattr(args, "preload", True):
+            init_worker(args)
+        return multiprocessing.Pool(args.processes, initializer=init_worker,
+                                    initargs=(args,))
+    if args.threads > 1:
+        if args.cache is not None:
+            # opened once, before the worker threads need it
+            get_cache(args)
+        return multiprocessing.pool.ThreadPool(
+            args.threads, initializer=init_worker, initargs=(args,)
+        )
+    init_worker(args)
+    return None
+
+
+class ThroughputReporter(object):
+    """Writes the number of processed lines, bytes and tokens, and their
+    rates, to a stream at regular intervals. The number of lines that
+    skipped normalization is included once there are any.
+
+    Arguments:
+        interval: seconds between reports, or None to disable reporting.
+        stream: the stream to write to.
+    """
+
+    def __init__(self, interval=None, stream=None):
+        self.interval = interval
+        self.stream = stream if stream is not None else sys.stderr
+        self.lines = 0
+        self.bytes = 0
+        self.tokens = 0
+        self.skipped = 0
+        self._start = self._last = time.perf_counter()
+        self._last_counts = (0, 0, 0)
+
+    def update(self, lines, num_bytes, tokens, skipped=0):
+        self.lines += lines
+        self.bytes += num_bytes
+        self.tokens += tokens
+        self.skipped += skipped
+        if self.interval is None:
+            return
+        now = time.perf_counter()
+        if now - self._last >= self.interval:
+            self._report(now - self._last, self._last_counts)
+            self._last = now
+            self._last_counts = (self.lines, self.bytes, self.tokens)
+
+    def _report(self, elapsed, since=(0, 0, 0)):
+        lines, num_bytes, tokens = (self.lines - since[0],
+                                    self.bytes - since[1],
+                                    self.tokens - since[2])
+        elapsed = max(elapsed, 1e-9)
+        skipped = ""
+        if self.skipped:
+            skipped = f" ({self.skipped} not normalized)"
+        self.stream.write(
+            f"{self.lines} lines{skipped}, {self.bytes / 1e6:.1f} MB, "
+            f"{self.tokens} tokens; {lines / elapsed:.1f} lines/s, "
+            f"{num_bytes / elapsed / 1e6:.2f} MB/s, "
+            f"{tokens / elapsed:.1f} tokens/s\n"
+        )
+        self.stream.flush()
+
+    def close(self):
+        """Reports the totals and average rates."""
+        if self.interval is not None:
+            self._report(time.perf_counter() - self._start)
+
+
+def report_memory(stream=None):
+    """Writes the RSS and PSS of this process and its worker processes."""
+    stream = stream if stream is not None else sys.stderr
+    processes = [(multiprocessing.current_process().name, os.getpid())]
+    processes += sorted((p.name, p.pid)
+                        for p in multiprocessing.active_children())
+    total_rss = total_pss = 0
+    for name, pid in processes:
+        usage = process_memory(pid)
+        if usage is None:
+            stream.write(f"{name} (pid {pid}): memory usage not available\n")
+            continue
+        total_rss += usage["rss"]
+        total_pss += usage["pss"]
+        stream.write(f"{name} (pid {pid}): RSS {usage['rss'] / 1e6:.1f} MB, "
+                     f"PSS {usage['pss'] / 1e6:.1f} MB, "
+                     f"shared {usage['shared'] / 1e6:.1f} MB\n")
+    stream.write(f"total: RSS {total_rss / 1e6:.1f} MB, "
+                 f"PSS {total_pss / 1e6:.1f} MB\n")
+    stream.flush()
+
+
+def set_postfix(progress, reporter):
+    postfix = {"lines": str(reporter.lines)}
+    if reporter.skipped:
+        postfix["not_normalized"] = str(reporter.skipped)
+    progress.set_postfix(postfix, refresh=False)
+
+
+def run_stream(args, pool):
+    num_bytes = None
+    if args.input_path is not None:
+        num_bytes = os.path.getsize(args.input_path)
+    in_stream = (open(args.input_path, "rb")
+                 if args.input_path is not None else sys.stdin.buffer)
+    if args.corpus:
+        func = analyze_lines
+        writer = CorpusWriter(args.output_path)
+
+        def write(docs):
+            for doc in docs:
+                writer.add(doc)
+    else:
+        func = process_lines
+        writer = None
+        write = (open(args.output_path, "wb")
+                 if args.output_path is not None else sys.stdout.buffer).write
+    chunks = chunked(in_stream, args.chunk_size)
+    if pool is None:
+        results = map(func, chunks)
+    else:
+        max_chunks = (args.max_chunks or
+                      max(args.processes, args.threads) * 2)
+        results = imap_ordered(pool, func, chunks, max_chunks)
+    progress = tqdm.tqdm(total=num_bytes, unit="B", unit_scale=True,
+                         desc="processing text", disable=not args.progress)
+    reporter = ThroughputReporter(args.report_interval)
+    try:
+        for n_lines, n_bytes, n_tokens, n_skipped, output in results:
+            write(output)
+            progress.update(n_bytes)
+            reporter.update(n_lines, n_bytes, n_tokens, n_skipped)
+            set_postfix(progress, reporter)
+    finally:
+        progress.close()
+        reporter.close()
+    if writer is not None:
+        writer.close()
+
+
+def run_sharded(args, pool):
+    shards = [(args.input_path, start, end,
+               shard_path(args.output_path, start, end))
+              for start, end in shard_offsets(args.input_path, args.shards)]
+    todo = shards
+    if args.resume:
+        todo = [shard for shard in shards if not os.path.exists(shard[3])]
+    progress = tqdm.tqdm(total=sum(end - start for _, start, end, _ in todo),
+                         unit="B", unit_scale=True, desc="processing shards",
+                         disable=not args.progress)
+    reporter = ThroughputReporter(args.report_interval)
+    if pool is None:
+        results = map(_process_shard, todo)
+    else:
+        results = pool.imap_unordered(_process_shard, todo)
+    try:
+        for n_lines, n_bytes, n_tokens, n_skipped in results:
+            progress.update(n_bytes)
+            reporter.update(n_lines, n_bytes, n_tokens, n_skipped)
+            set_postfix(progress, reporter)
+    finally:
+        progress.close()
+        reporter.close()
+    with open(args.output_path, "wb") as out:
+        for shard in shards:
+            with open(shard[3], "rb") as f:
+                shutil.copyfileobj(f, out, 1024 * 1024)
+    for shard in shards:
+        os.remove(shard[3])
+
+
+def serve(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="hangul-process serve",
+        description="Keeps warmed-up preprocessors resident and serves "
+                    "batched requests on a Unix domain socket. Connect with "
+                    "`hangul_utils.TokenizerClient`."
+    )
+    parser.add_argument("socket_path", help="Path of the socket to create.")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="Number of worker processes.")
+    parser.add_argument("--threads", type=int, default=1,
+                        help="Number of worker threads. Cannot be combined "
+                             "with multiple processes.")
+    parser.add_argument("-n", "--normalize", action="store_true",
+                        default=False,
+                        help="Start the normalizer (and its JVM) before "
+                             "serving.")
+    args = parser.parse_args(argv)
+    if args.processes > 1 and args.threads > 1:
+        parser.error("--processes and --threads cannot be combined")
+    server = TokenizerServer(args.socket_path, n_process=args.processes,
+                             n_threads=args.threads, normalize=args.normalize)
+    try:
+        server.start()
+        # stop cleanly, removing the socket, when terminated; set after the
+        # workers are started so that they keep the default handler
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        sys.stderr.write(f"serving on {args.socket_path}\n")
+        sys.stderr.flush()
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        server.close()
 
 
 def main():
-    parser = argparse.ArgumentParser()
+    # the input path is an optional positional argument, so `serve` cannot
+    # be an argparse subcommand; an input file named "serve" is "./serve"
+    if sys.argv[1:2] == ["serve"]:
+        return serve(sys.argv[2:])
+    parser = argparse.ArgumentParser(
+        epilog="Run `hangul-process serve SOCKET` to serve requests from a "
+               "resident process instead. An input file named `serve` must "
+               "be given as `./serve`."
+    )
     parser.add_argument("input_path", nargs="?")
     parser.add_argument("output_path", nargs="?")
     parser.add_argument("-P", "--progress", action="store_true", default=False,
                         help="Whether to display the progress bar using tqdm.")
     parser.add_argument("--processes", type=int, default=1,
                         help="Number of processes to utilize.")
+    parser.add_argument("--threads", type=int, default=1,
+                        help="Number of threads to utilize. Each thread uses "
+                             "its own MeCab tagger. Cannot be combined with "
+                             "multiple processes.")
+    parser.add_argument("--no-preload", dest="preload", action="store_false",
+                        default=True,
+                        help="Let every worker process build its own MeCab "
+                             "tagger, instead of forking them from a parent "
+                             "that has built it already.")
+    parser.add_argument("--report-memory", action="store_true",
+                        default=False,
+                        help="Report the RSS and PSS of the main process and "
+                             "every worker process to stderr when done "
+                             "(Linux only).")
+    parser.add_argument("--chunk-size", type=int, default=1000,
+                        help="Number of lines sent to a worker at a time.")
+    parser.add_argument("--max-chunks", type=int, default=None,
+                        help="Maximum number of chunks being processed or "
+                             "waiting to be written, which bounds memory "
+                             "usage. Defaults to twice the number of "
+                             "workers.")
     parser.add_argument("--skip-count", action="store_true", default=False,
-                        help="If enabled, the number of lines will not be "
-                             "pre-calculated before iterating the file content.")
+                        help="Deprecated and ignored; progress is measured "
+                             "in bytes, without counting lines beforehand.")
+    parser.add_argument("--report-interval", type=float, default=None,
+                        help="Report processed lines, bytes and tokens per "
+                             "second to stderr every this many seconds.")
     parser.add_argument("-d", "--delimiter", type=str, default=" ",
                         help="The delimiting character to use for splitting "
                              "text into tokens.")
@@ -55,6 +557,36 @@ def main():
                         help="Character to use for delimiting sentences.")
     parser.add_argument("-n", "--normalize", action="store_true", default=False,
                         help="Whether to perform unicode normalization.")
+    parser.add_argument("--normalize-strict", action="store_true",
+                        default=False,
+                        help="Normalize lines that the pre-check deems "
+                             "unchanged as well, and warn when they do "
+                             "change.")
+    parser.add_argument("--cache", type=str, default=None,
+                        help="Path to a persistent cache database of "
+                             "processed lines. Lines processed before with "
+                             "the same options and dictionary are served "
+                             "from the cache.")
+    parser.add_argument("--cache-size", type=float, default=None,
+                        help="Maximum size of the cache in megabytes. Least "
+                             "recently used lines are evicted beyond it.")
+    parser.add_argument("--cache-compact", action="store_true", default=False,
+                        help="Compact the cache database after processing.")
+    parser.add_argument("--shards", type=int, default=None,
+                        help="Split the input file into this many line-"
+                             "aligned byte ranges, which workers read "
+                             "directly and write to separate outputs that "
+                             "are concatenated at the end. Requires input "
+                             "and output paths.")
+    parser.add_argument("--resume", action="store_true", default=False,
+                        help="Skip shards completed by a previous, "
+                             "interrupted run with the same --shards.")
+    parser.add_argument("--corpus", action="store_true", default=False,
+                        help="Write a binary corpus of morphemes and POS tags "
+                             "to the output path (a directory) instead of "
+                             "delimited text. Read it with "
+                             "`hangul_utils.Corpus`. Lines are documents, "
+                             "split into sentences with -s.")
     group = parser.add_mutually_exclusive_group()
     group.add_argument("-w", "--word-tokenize", action="store_true",
                        default=False,
@@ -72,38 +604,47 @@ def main():
     group.add_argument("-j", "--join-jamos", action="store_true", default=False,
                        help="Joins jamos into syllables whenever possible.")
     args = parser.parse_args()
-    num_lines = None
-    if args.input_path is not None and args.progress and not args.skip_count:
-        with open(args.input_path, "rb") as f:
-            num_lines = sum(1 for _ in f)
-    in_stream = (open(args.input_path, "r")
-                 if args.input_path is not None else sys.stdin)
-    out_stream = (open(args.output_path, "wb")
-                  if args.output_path is not None else sys.stdout.buffer)
-    desc = "processing text"
-    tqdm_kwargs = dict(unit="lines", desc="processing text")
-    if num_lines is not None:
-        tqdm_kwargs["total"] = num_lines
-    if args.processes == 1:
-        it = itertools.starmap(
-            process,
-            tqdm.tqdm(
-                iterable=zip(itertools.repeat(args), in_stream),
-                disable=not args.progress, **tqdm_kwargs
-            )
-        )
-    else:
-        it = map_async.starmap_async(
-            func=process,
-            iterable=zip(itertools.repeat(args), in_stream),
-            processes=args.processes,
-            show_progress=args.progress,
-            desc=desc,
-            tqdm_kwargs=tqdm_kwargs
-        )
-    for line in it:
-        out_stream.write(line.encode("utf-8", "surrogatepass"))
-        out_stream.write(b"\n")
+    if args.processes > 1 and args.threads > 1:
+        parser.error("--processes and --threads cannot be combined")
+    if args.shards is not None and (args.input_path is None or
+                                    args.output_path is None):
+        parser.error("--shards requires input and output paths")
+    if args.resume and args.shards is None:
+        parser.error("--resume requires --shards")
+    if args.corpus:
+        if args.output_path is None:
+            parser.error("--corpus requires an output path")
+        if args.word_tokenize or args.pos_tokenize:
+            parser.error("--corpus always stores morphemes and POS tags")
+        if args.shards is not None or args.cache is not None:
+            parser.error("--corpus cannot be combined with --shards or "
+                         "--cache")
+    server = None
+    args.normalizer = None
+    if args.normalize and args.processes > 1:
+        # one warm JVM shared by all workers, which pre-check lines themselves
+        server = NormalizerServer()
+        server.start()
+        args.normalizer = server.client()
+    pool = create_pool(args)
+    try:
+        if args.shards is not None:
+            run_sharded(args, pool)
+        else:
+            run_stream(args, pool)
+        if args.report_memory:
+            report_memory()
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        if server is not None:
+            server.close()
+    if args.cache is not None:
+        cache = get_cache(args)
+        if args.cache_compact:
+            cache.compact()
+        cache.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,338 @@
+__all__ = ["TokenizerServer", "TokenizerClient"]
+
+import os
+import copy
+import json
+import socket
+import struct
+import threading
+import socketserver
+import multiprocessing
+import multiprocessing.pool
+
+from .normalizer import NormalizerServer
+from .preprocess import Preprocessor, PIPE_TASKS, _init_worker, \
+    _run_worker_task
+
+# A frame is a 4-byte big-endian length followed by that many bytes of UTF-8
+# JSON. Requests are {"task": ..., "texts": [...], "kwargs": {...}}; responses
+# are {"results": [...]} or {"error": "..."}.
+_HEADER = struct.Struct(">I")
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+
+def send_frame(sock, obj):
+    data = json.dumps(obj, ensure_ascii=False).encode("utf-8",
+                                                      "surrogatepass")
+    if len(data) > MAX_FRAME_SIZE:
+        raise ValueError(f"frame of {len(data)} bytes exceeds the maximum of "
+                         f"{MAX_FRAME_SIZE} bytes")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exactly(sock, size):
+    buf = bytearray(size)
+    view = memoryview(buf)
+    pos = 0
+
+    while pos < size:
+        n = sock.recv_into(view[pos:])
+
+        if not n:
+            raise EOFError("connection closed")
+
+        pos += n
+
+    return buf
+
+
+def recv_frame(sock):
+    """Receives a frame. Raises EOFError if the connection is closed before
+    a frame starts or while it is read."""
+    size, = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+
+    if size > MAX_FRAME_SIZE:
+        raise ValueError(f"frame of {size} bytes exceeds the maximum of "
+                         f"{MAX_FRAME_SIZE} bytes")
+
+    return json.loads(_recv_exactly(sock, size).decode("utf-8",
+                                                       "surrogatepass"))
+
+
+class _Handler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        while True:
+            try:
+                request = recv_frame(self.request)
+            except (EOFError, ConnectionResetError):
+                break
+            except ValueError as e:
+                # the stream cannot be resynchronized after a bad frame
+                send_frame(self.request, {"error": str(e)})
+                break
+
+            try:
+                response = {"results": self.server.run(request)}
+            except Exception as e:
+                response = {"error": f"{type(e).__name__}: {e}"}
+
+            send_frame(self.request, response)
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, run):
+        self.run = run
+        super().__init__(path, _Handler)
+
+
+class TokenizerServer(object):
+    """Serves a resident, warmed-up `Preprocessor` over a Unix domain socket,
+    so that short-lived clients do not pay for loading MeCab, the dictionary
+    and the JVM.
+
+    Every connection is handled on its own thread and may send any number of
+    requests, each a batch of texts for one of the `Preprocessor.pipe` tasks.
+    Batches run on a resident pool of worker processes (`n_process`) or
+    threads (`n_threads`), each with its own warmed-up tagger.
+
+    Arguments:
+        path: path of the socket. A stale socket file is replaced.
+        preprocessor: the `Preprocessor` to serve; a new one by default.
+        n_process: number of worker processes.
+        n_threads: number of worker threads, if `n_process` is 1.
+        normalize: whether to start the normalizer before serving as well.
+            Worker processes share it through a `NormalizerServer`.
+    """
+
+    def __init__(self, path, preprocessor=None, n_process=1, n_threads=1,
+                 normalize=False):
+        if n_process > 1 and n_threads > 1:
+            raise ValueError("n_process and n_threads cannot both be greater "
+                             "than 1")
+
+        if preprocessor is None:
+            preprocessor = Preprocessor()
+
+        self.path = path
+        self.preprocessor = preprocessor
+        self.n_process = n_process
+        self.n_threads = n_threads
+        self.normalize = normalize
+        self._server = None
+        self._serving = False
+        self._pool = None
+        self._normalizer = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _remove_stale_socket(self):
+        if not os.path.exists(self.path):
+            return
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(self.path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(self.path)
+            else:
+                raise RuntimeError(f"a server is already listening on "
+                                   f"{self.path}")
+
+    def start(self):
+        """Warms up the workers and starts listening, without serving
+        yet."""
+        self._remove_stale_socket()
+        preprocessor = self.preprocessor
+
+        if self.n_process > 1:
+            if self.normalize:
+                # a JVM cannot be forked; workers share one in a server
+                self._normalizer = NormalizerServer()
+                self._normalizer.start()
+                preprocessor = copy.copy(preprocessor)
+                preprocessor._normalizer = self._normalizer.client()
+
+            self._pool = multiprocessing.Pool(
+                self.n_process, initializer=_init_worker,
+                initargs=(preprocessor, True)
+            )
+        else:
+            if self.normalize:
+                preprocessor.normalize_batch(["워밍업"])
+
+            self._pool = multiprocessing.pool.ThreadPool(
+                self.n_threads, initializer=_init_worker,
+                initargs=(preprocessor, True, False)
+            )
+
+        self._server = _UnixServer(self.path, self._run)
+
+    def _run(self, request):
+        task = request.get("task")
+
+        if task not in PIPE_TASKS:
+            raise ValueError(f"unsupported task: {task}; must be one of "
+                             f"{sorted(PIPE_TASKS)}")
+
+        texts = request.get("texts", [])
+        kwargs = request.get("kwargs", {})
+
+        if kwargs.get("columnar"):
+            raise ValueError("columnar results cannot be served")
+
+        return self._pool.apply(_run_worker_task, (task, texts, kwargs))
+
+    def serve_forever(self):
+        if self._server is None:
+            self.start()
+
+        self._serving = True
+        self._server.serve_forever()
+
+    def serve_in_thread(self):
+        """Serves on a daemon thread. Returns the thread."""
+        if self._server is None:
+            self.start()
+
+        self._serving = True
+        thread = threading.Thread(target=self._server.serve_forever,
+                                  daemon=True)
+        thread.start()
+
+        return thread
+
+    def close(self):
+        if self._server is not None:
+            if self._serving:
+                self._server.shutdown()
+                self._serving = False
+
+            self._server.server_close()
+            self._server = None
+
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+        if self._normalizer is not None:
+            self._normalizer.close()
+            self._normalizer = None
+
+
+class TokenizerClient(object):
+    """A client of a `TokenizerServer` (or `hangul-process serve`), with a
+    connection per thread that is reused across requests and made again if
+    the server drops it.
+
+    Arguments:
+        path: path of the server socket.
+        timeout: socket timeout in seconds, or None to wait indefinitely.
+    """
+
+    def __init__(self, path, timeout=None):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def __getstate__(self):
+        # connections are made again after unpickling
+        return {"path": self.path, "timeout": self.timeout}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _connection(self):
+        sock = getattr(self._local, "sock", None)
+
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+
+            self._local.sock = sock
+
+        return sock
+
+    def _request(self, request):
+        reused = getattr(self._local, "sock", None) is not None
+        sock = self._connection()
+
+        try:
+            send_frame(sock, request)
+            return recv_frame(sock)
+        except (EOFError, BrokenPipeError, ConnectionResetError):
+            self.close()
+
+            if not reused:
+                raise
+
+        # the server closed an idle connection; try once more on a new one
+        sock = self._connection()
+        send_frame(sock, request)
+
+        return recv_frame(sock)
+
+    def batch(self, task, texts, **kwargs):
+        """Runs a `Preprocessor.pipe` task on a list of texts with a single
+        request. Returns the list of results."""
+        response = self._request({"task": task, "texts": list(texts),
+                                  "kwargs": kwargs})
+
+        if "error" in response:
+            raise RuntimeError(f"tokenizer server failed: "
+                               f"{response['error']}")
+
+        return response["results"]
+
+    def normalize(self, text):
+        return self.batch("normalize", [text])[0]
+
+    def word_tokenize(self, text):
+        """Returns the list of words."""
+        return self.batch("word", [text])[0]
+
+    def sent_tokenize(self, text, residual=True):
+        """Returns the list of sentences."""
+        return self.batch("sent", [text], residual=residual)[0]
+
+    def morph_tokenize(self, text, pos=False):
+        """Returns the list of morphemes, or morpheme and pos tuples if pos
+        is True."""
+        morphs = self.batch("morph", [text], pos=pos)[0]
+
+        if pos:
+            morphs = [tuple(morph) for morph in morphs]
+
+        return morphs
+
+    def close(self):
+        sock = getattr(self._local, "sock", None)
+
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
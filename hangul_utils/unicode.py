@@ -1,7 +1,13 @@
 __all__ = ["split_syllable_char", "split_syllables",
-           "join_jamos", "join_jamos_char",
+           "join_jamos", "join_jamos_char", "JamoComposer",
+           "encode_jamo_ids", "decode_jamo_ids",
+           "split_syllables_batch", "join_jamos_batch",
            "CHAR_INITIALS", "CHAR_MEDIALS", "CHAR_FINALS"]
 
+import re
+import sys
+import array
+import functools
 import itertools
 
 INITIAL = 0x001
@@ -37,6 +43,30 @@ CHAR_INDICES = {k: {c: i for i, c in enumerate(v)}
                 for k, v in CHAR_LISTS.items()}
 
 
+def _build_split_char_table():
+    table = {}
+    finals = [None] + CHAR_FINALS
+    for i, init in enumerate(CHAR_INITIALS):
+        for j, med in enumerate(CHAR_MEDIALS):
+            base = 0xac00 + (i * 21 + j) * 28
+            for k, final in enumerate(finals):
+                table[chr(base + k)] = (init, med, final)
+    # compatibility jamos take the first position they can fill
+    for pos in (FINAL, MEDIAL, INITIAL):
+        for c in CHAR_LISTS[pos]:
+            table[c] = tuple(c if p == pos else None
+                             for p in (INITIAL, MEDIAL, FINAL))
+    return table
+
+
+# Precomputed (initial, medial, final) triples for all 11,172 syllables and
+# the supported compatibility jamos.
+SPLIT_CHAR_TABLE = _build_split_char_table()
+_UNSUPPORTED_REGEX = re.compile("[^{}{}]".format(
+    "\uac00-\ud7a3", re.escape("".join(sorted(CHARSET)))
+))
+
+
 def is_hangul_syllable(c):
     return 0xac00 <= ord(c) <= 0xd7a3  # Hangul Syllables
 
@@ -109,33 +139,22 @@ def split_syllable_char(c):
     if len(c) != 1:
         raise ValueError("Input string must have exactly one character.")
 
-    init, med, final = None, None, None
-    if is_hangul_syllable(c):
-        offset = ord(c) - 0xac00
-        x = (offset - offset % 28) // 28
-        init, med, final = x // 21, x % 21, offset % 28
-        if not final:
-            final = None
-        else:
-            final -= 1
-    else:
-        pos = get_jamo_type(c)
-        if pos & INITIAL == INITIAL:
-            pos = INITIAL
-        elif pos & MEDIAL == MEDIAL:
-            pos = MEDIAL
-        elif pos & FINAL == FINAL:
-            pos = FINAL
-        idx = CHAR_INDICES[pos][c]
-        if pos == INITIAL:
-            init = idx
-        elif pos == MEDIAL:
-            med = idx
-        else:
-            final = idx
-    return tuple(CHAR_LISTS[pos][idx] if idx is not None else None
-                 for pos, idx in
-                 zip([INITIAL, MEDIAL, FINAL], [init, med, final]))
+    try:
+        return SPLIT_CHAR_TABLE[c]
+    except KeyError:
+        raise ValueError(f"'{c}' is not a splittable hangul character.")
+
+
+@functools.lru_cache(maxsize=16)
+def _get_split_table(pad):
+    """Builds a `str.translate` table for splitting syllables (and placing
+    jamos when padding) with the given pad."""
+    if pad is None:
+        return {ord(c): "".join(filter(None, jamos))
+                for c, jamos in SPLIT_CHAR_TABLE.items()
+                if is_hangul_syllable(c)}
+    return {ord(c): "".join(pad if x is None else x for x in jamos)
+            for c, jamos in SPLIT_CHAR_TABLE.items()}
 
 
 def split_syllables(s, ignore_err=True, pad=None):
@@ -162,22 +181,14 @@ def split_syllables(s, ignore_err=True, pad=None):
         >>> split_syllables("안녕하세요ㅛ", pad="x")
         'ㅇㅏㄴㄴㅕㅇㅎㅏxㅅㅔxㅇㅛxxㅛx'
     """
-
-    def try_split(c):
-        try:
-            return split_syllable_char(c)
-        except ValueError:
-            if ignore_err:
-                return (c,)
+    if not ignore_err:
+        m = _UNSUPPORTED_REGEX.search(s)
+        if m is not None:
+            c = m.group()
             raise ValueError(f"encountered an unsupported character: "
                              f"{c} (0x{ord(c):x})")
 
-    s = map(try_split, s)
-    if pad is not None:
-        tuples = map(lambda x: tuple(pad if y is None else y for y in x), s)
-    else:
-        tuples = map(lambda x: filter(None, x), s)
-    return "".join(itertools.chain(*tuples))
+    return s.translate(_get_split_table(pad))
 
 
 def join_jamos_char(init, med, final=None):
@@ -206,6 +217,58 @@ def join_jamos_char(init, med, final=None):
     return chr(0xac00 + 28 * 21 * init_idx + 28 * med_idx + final_idx)
 
 
+# Jamo type bitmasks (e.g. INITIAL | FINAL for 'ㄱ') of the supported jamos.
+JAMO_TYPES = {c: sum(t for t, s in CHAR_SETS.items() if c in s)
+              for c in CHARSET}
+# Syllables keyed by their jamo sequence, e.g. "ㅇㅏㄴ" -> "안".
+JOIN_TABLE = {"".join(filter(None, jamos)): c
+              for c, jamos in SPLIT_CHAR_TABLE.items()
+              if is_hangul_syllable(c)}
+
+
+def _join_action(last_t, t):
+    """Decides what happens to the pending jamos when a jamo of type `t`
+    follows one of type `last_t`. Returns the number of trailing jamos to
+    keep pending after the rest are flushed into a syllable, or None if
+    nothing is flushed."""
+    if t & FINAL == FINAL:
+        return None if last_t == MEDIAL else 0
+    if t == MEDIAL and last_t & INITIAL == INITIAL:
+        # the preceding consonant becomes the initial of the next syllable
+        return 1
+    return 0
+
+
+# A well-formed syllable as the state machine in `join_jamos` would group it:
+# a final is only taken if it cannot be the initial of a following syllable.
+_SYLLABLE_REGEX = re.compile("[{0}][{1}](?:[{2}]|[{3}](?![{1}]))?".format(
+    "".join(CHAR_INITIALS), "".join(CHAR_MEDIALS),
+    "".join(c for c in CHAR_FINALS if c not in CHAR_SETS[INITIAL]),
+    "".join(c for c in CHAR_FINALS if c in CHAR_SETS[INITIAL])
+))
+_JOIN_ACTIONS = {last_t: {t: _join_action(last_t, t)
+                          for t in set(JAMO_TYPES.values())}
+                 for last_t in {0} | set(JAMO_TYPES.values())}
+
+
+def _compose_jamos(jamos, ignore_err=True):
+    """Combines a flushed run of jamos (a list of one to three jamos) into a
+    syllable, falling back to the jamos themselves if they do not form
+    one."""
+    if len(jamos) == 1:
+        if not ignore_err:
+            raise ValueError(f"invalid jamo character: {jamos[0]}")
+        return jamos[0]
+    key = "".join(jamos)
+    syllable = JOIN_TABLE.get(key)
+    if syllable is None:
+        # Invalid jamo combination
+        if not ignore_err:
+            raise ValueError(f"invalid jamo characters: {jamos}")
+        return key
+    return syllable
+
+
 def join_jamos(s, ignore_err=True):
     """
     Combines a sequence of jamos to produce a sequence of syllables.
@@ -226,54 +289,497 @@ def join_jamos(s, ignore_err=True):
         "안ㄴ녕하세요"
         >>> join_jamos()
     """
-    last_t = 0
+    if ignore_err:
+        # every jamo that does not form a syllable is left untouched, so only
+        # the syllables need to be found
+        return _SYLLABLE_REGEX.sub(lambda m: JOIN_TABLE[m.group()], s)
+
+    buf = []
     queue = []
-    new_string = ""
-
-    def flush(n=0):
-        new_queue = []
-        while len(queue) > n:
-            new_queue.append(queue.pop())
-        if len(new_queue) == 1:
-            if not ignore_err:
-                raise ValueError(f"invalid jamo character: {new_queue[0]}")
-            result = new_queue[0]
-        elif len(new_queue) >= 2:
-            try:
-                result = join_jamos_char(*new_queue)
-            except (ValueError, KeyError):
-                # Invalid jamo combination
-                if not ignore_err:
-                    raise ValueError(f"invalid jamo characters: {new_queue}")
-                result = "".join(new_queue)
-        else:
-            result = None
-        return result
+    last_t = 0
 
     for c in s:
-        if c not in CHARSET:
+        t = JAMO_TYPES.get(c)
+        if t is None:
             if queue:
-                new_c = flush() + c
-            else:
-                new_c = c
+                buf.append(_compose_jamos(queue, ignore_err))
+                queue = []
+            buf.append(c)
             last_t = 0
-        else:
-            t = get_jamo_type(c)
-            new_c = None
-            if t & FINAL == FINAL:
-                if not (last_t == MEDIAL):
-                    new_c = flush()
-            elif t == INITIAL:
-                new_c = flush()
-            elif t == MEDIAL:
-                if last_t & INITIAL == INITIAL:
-                    new_c = flush(1)
-                else:
-                    new_c = flush()
-            last_t = t
-            queue.insert(0, c)
-        if new_c:
-            new_string += new_c
+            continue
+        keep = _JOIN_ACTIONS[last_t][t]
+        if keep is not None and len(queue) > keep:
+            if keep:
+                buf.append(_compose_jamos(queue[:-keep], ignore_err))
+                queue = queue[-keep:]
+            else:
+                buf.append(_compose_jamos(queue, ignore_err))
+                queue = []
+        queue.append(c)
+        last_t = t
     if queue:
-        new_string += flush()
-    return new_string
+        buf.append(_compose_jamos(queue, ignore_err))
+    return "".join(buf)
+
+
+class JamoComposer(object):
+    """
+    Composes syllables incrementally from a stream of jamos, such as
+    keystrokes, following the same rules as `join_jamos`. Each jamo is
+    handled in constant time.
+
+    Arguments:
+        ignore_err (bool): Same as in `join_jamos`. (default: True)
+
+    Example:
+        >>> composer = JamoComposer()
+        >>> [composer.feed(c) for c in "ㅇㅏㄴㄴㅕ"]
+        ['', '', '', '안', '']
+        >>> composer.preedit
+        '녀'
+        >>> composer.flush()
+        '녀'
+    """
+
+    def __init__(self, ignore_err=True):
+        self.ignore_err = ignore_err
+        self._queue = []
+        self._last_t = 0
+        self._preedit = ""
+
+    @property
+    def preedit(self):
+        """The syllable (or jamos) still being composed."""
+        return self._preedit
+
+    def feed(self, c):
+        """
+        Adds a character to the composition.
+
+        Arguments:
+            c (str): A single character, usually a jamo. Non-jamo characters
+                commit the pending syllable along with themselves.
+
+        Returns:
+            Text committed by this character (possibly empty).
+        """
+        t = JAMO_TYPES.get(c)
+        if t is None:
+            return self.flush() + c
+        committed = ""
+        keep = _JOIN_ACTIONS[self._last_t][t]
+        queue = self._queue
+        if keep is not None and len(queue) > keep:
+            if keep:
+                committed = _compose_jamos(queue[:-keep], self.ignore_err)
+                queue = queue[-keep:]
+            else:
+                committed = _compose_jamos(queue, self.ignore_err)
+                queue = []
+        queue.append(c)
+        self._queue = queue
+        self._last_t = t
+        self._preedit = _compose_jamos(queue)
+        return committed
+
+    def flush(self):
+        """
+        Commits the pending syllable.
+
+        Returns:
+            Text committed (possibly empty).
+        """
+        committed = ""
+        if self._queue:
+            committed = _compose_jamos(self._queue, self.ignore_err)
+        self.reset()
+        return committed
+
+    def reset(self):
+        """Discards the pending syllable."""
+        self._queue = []
+        self._last_t = 0
+        self._preedit = ""
+
+
+# Jamo ids: 0 pads empty jamo positions and sequences, 1 marks characters
+# outside the vocabulary, followed by the initials, medials and finals.
+# Characters in `extra` are numbered from `NUM_JAMO_IDS` onwards.
+JAMO_PAD_ID = 0
+JAMO_UNK_ID = 1
+JAMO_ID_OFFSETS = {
+    INITIAL: 2,
+    MEDIAL: 2 + len(CHAR_INITIALS),
+    FINAL: 2 + len(CHAR_INITIALS) + len(CHAR_MEDIALS)
+}
+NUM_JAMO_IDS = JAMO_ID_OFFSETS[FINAL] + len(CHAR_FINALS)
+# ids are handled as code units of a string, so they must stay clear of
+# the syllable range used while decoding
+_MAX_JAMO_IDS = 0xac00
+_UTF16 = "utf-16-le" if sys.byteorder == "little" else "utf-16-be"
+
+
+class _UnknownMapping(dict):
+    """A `str.translate` table that maps every unlisted character to the
+    given value."""
+
+    def __init__(self, mapping, default):
+        super(_UnknownMapping, self).__init__(mapping)
+        self.default = default
+
+    def __missing__(self, key):
+        return self.default
+
+
+def _jamo_ids(jamos):
+    return tuple(JAMO_PAD_ID if c is None else JAMO_ID_OFFSETS[pos] +
+                 CHAR_INDICES[pos][c]
+                 for pos, c in zip((INITIAL, MEDIAL, FINAL), jamos))
+
+
+def _check_extra(extra):
+    if NUM_JAMO_IDS + len(extra) > _MAX_JAMO_IDS:
+        raise ValueError(f"too many extra characters: {len(extra)}")
+
+
+@functools.lru_cache(maxsize=16)
+def _get_encode_table(fixed, extra):
+    _check_extra(extra)
+    table = {}
+    for c, jamos in SPLIT_CHAR_TABLE.items():
+        ids = _jamo_ids(jamos)
+        if not fixed:
+            ids = (i for i in ids if i != JAMO_PAD_ID)
+        table[ord(c)] = "".join(map(chr, ids))
+    pad = chr(JAMO_PAD_ID) * 2 if fixed else ""
+    for i, c in enumerate(extra):
+        table.setdefault(ord(c), chr(NUM_JAMO_IDS + i) + pad)
+    return _UnknownMapping(table, chr(JAMO_UNK_ID) + pad)
+
+
+@functools.lru_cache(maxsize=16)
+def _get_decode_tables(fixed, extra, unk):
+    _check_extra(extra)
+    syllables = {}
+    for c, jamos in SPLIT_CHAR_TABLE.items():
+        if not is_hangul_syllable(c):
+            continue
+        ids = _jamo_ids(jamos)
+        if not fixed:
+            ids = (i for i in ids if i != JAMO_PAD_ID)
+        syllables["".join(map(chr, ids))] = c
+    table = {JAMO_PAD_ID: None, JAMO_UNK_ID: unk}
+    for pos, chars in CHAR_LISTS.items():
+        table.update((JAMO_ID_OFFSETS[pos] + i, c)
+                     for i, c in enumerate(chars))
+    table.update((NUM_JAMO_IDS + i, c) for i, c in enumerate(extra))
+    # a syllable is an initial id and a medial id followed by a final id,
+    # which is a pad id for syllables without final in the fixed layout
+    ranges = ["{}-{}".format(
+        re.escape(chr(JAMO_ID_OFFSETS[pos])),
+        re.escape(chr(JAMO_ID_OFFSETS[pos] + len(CHAR_LISTS[pos]) - 1))
+    ) for pos in (INITIAL, MEDIAL, FINAL)]
+    if fixed:
+        pattern = "[{}][{}][{}{}]".format(*ranges, re.escape(chr(JAMO_PAD_ID)))
+    else:
+        pattern = "[{}][{}][{}]?".format(*ranges)
+    return syllables, re.compile(pattern), table
+
+
+def _to_array(units, numpy):
+    data = units.encode(_UTF16, "surrogatepass")
+    if numpy:
+        np = _import_numpy()
+        return np.frombuffer(data, dtype=np.uint16).copy()
+    ids = array.array("H")
+    ids.frombytes(data)
+    return ids
+
+
+def _to_units(ids):
+    if isinstance(ids, array.array) and ids.typecode == "H":
+        return ids.tobytes().decode(_UTF16, "surrogatepass")
+    if hasattr(ids, "dtype"):
+        return ids.astype("=u2").tobytes().decode(_UTF16, "surrogatepass")
+    return "".join(map(chr, ids))
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("could not import `numpy`; make sure that "
+                          "the package is installed by running "
+                          "`pip install numpy`. ")
+    return numpy
+
+
+def encode_jamo_ids(s, fixed=True, max_len=None, extra="", numpy=False):
+    """
+    Encodes a string or a batch of strings into jamo ids.
+
+    Initials, medials and finals have separate ids, so a consonant is
+    encoded by the position it takes. 0 (`JAMO_PAD_ID`) pads empty jamo
+    positions and short sequences, and 1 (`JAMO_UNK_ID`) marks characters
+    that are neither Hangul nor in `extra`.
+
+    Arguments:
+        s (str or list): A string or a list of strings.
+        fixed (bool): If set True, every character takes exactly three ids
+            (initial, medial and final), like `split_syllables` with a pad.
+            Otherwise only the jamos that are present are encoded, which
+            leaves no syllable boundaries: like
+            `join_jamos(split_syllables(x))`, decoding then loses
+            standalone jamos that can join their neighbors. (default: True)
+        max_len (int): Truncates or pads every sequence to `max_len` ids.
+            (default: None)
+        extra (str): Additional characters (e.g. spaces and punctuations)
+            to give ids, numbered from `NUM_JAMO_IDS`. (default: "")
+        numpy (bool): Returns NumPy uint16 arrays instead of `array('H')`.
+            (default: False)
+
+    Returns:
+        For a string, an array of ids. For a batch with `max_len`, an array
+        of `len(s) * max_len` ids (a `(len(s), max_len)` NumPy array).
+        For a batch without `max_len`, a tuple of the concatenated ids and
+        an int64 offsets array of `len(s) + 1` boundaries.
+
+    Example:
+        >>> list(encode_jamo_ids("안ㅋ"))
+        [13, 21, 45, 17, 0, 0]
+        >>> list(encode_jamo_ids("안ㅋ", fixed=False))
+        [13, 21, 45, 17]
+    """
+    table = _get_encode_table(fixed, extra)
+    pad = chr(JAMO_PAD_ID)
+
+    def encode(x):
+        units = x.translate(table)
+        if max_len is not None:
+            units = units[:max_len].ljust(max_len, pad)
+        return units
+
+    if isinstance(s, str):
+        return _to_array(encode(s), numpy)
+
+    units = [encode(x) for x in s]
+    ids = _to_array("".join(units), numpy)
+    if max_len is not None:
+        if numpy:
+            ids = ids.reshape(len(units), max_len)
+        return ids
+    offsets = array.array("q", [0])
+    offsets.extend(itertools.accumulate(map(len, units)))
+    if numpy:
+        offsets = _import_numpy().array(offsets, dtype="int64")
+    return ids, offsets
+
+
+def decode_jamo_ids(ids, fixed=True, offsets=None, extra="", unk="\ufffd"):
+    """
+    Decodes jamo ids produced by `encode_jamo_ids` back into text. Syllables
+    are built directly from the ids; pad ids are dropped.
+
+    Only ids encoded with `fixed=True` round-trip exactly. Without syllable
+    boundaries, standalone jamos are joined with their neighbors where they
+    can be, e.g. "ㄷㅒㄲ" is decoded as "댸ㄲ".
+
+    Arguments:
+        ids: An `array('H')`, a NumPy array (one row per sequence if
+            two-dimensional) or a list of ids.
+        fixed (bool): Must match the value used for encoding. If False, the
+            decoding is lossy for standalone jamos. (default: True)
+        offsets: Sequence boundaries of a ragged batch, as returned by
+            `encode_jamo_ids`. (default: None)
+        extra (str): Must match the value used for encoding. (default: "")
+        unk (str): Replacement for unknown character ids. (default: U+FFFD)
+
+    Returns:
+        A string, or a list of strings for batches.
+
+    Example:
+        >>> decode_jamo_ids(encode_jamo_ids("안ㅋ"))
+        '안ㅋ'
+    """
+    syllables, regex, table = _get_decode_tables(fixed, extra, unk)
+
+    def decode(units):
+        units = regex.sub(lambda m: syllables[m.group()], units)
+        return units.translate(table)
+
+    if getattr(ids, "ndim", 1) == 2:
+        return [decode(_to_units(row)) for row in ids]
+    units = _to_units(ids)
+    if offsets is None:
+        return decode(units)
+    offsets = list(offsets)
+    return [decode(units[i:j]) for i, j in zip(offsets, offsets[1:])]
+
+
+def _to_codepoints(np, texts):
+    """Concatenates strings into a uint32 codepoint buffer. Returns the
+    buffer and the int64 offsets of each string in it."""
+    codes = np.frombuffer("".join(texts).encode("utf-32-le", "surrogatepass"),
+                          dtype="<u4").astype(np.uint32)
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    np.cumsum([len(t) for t in texts], out=offsets[1:])
+    return codes, offsets
+
+
+def _from_codepoints(np, codes, offsets):
+    s = codes.astype("<u4").tobytes().decode("utf-32-le", "surrogatepass")
+    offsets = offsets.tolist()
+    return [s[i:j] for i, j in zip(offsets, offsets[1:])]
+
+
+@functools.lru_cache(maxsize=1)
+def _get_jamo_arrays():
+    """Lookup arrays for vectorized splitting and joining: codepoints of the
+    initials, medials and finals (index 0 of finals is unused), and, indexed
+    by codepoints up to the end of the compatibility jamo block (clip larger
+    codepoints to `_JAMO_LUT_SIZE - 1`), the position each jamo takes when
+    split and its initial/medial/final indices (-1 if not applicable)."""
+    np = _import_numpy()
+    inits = np.array([ord(c) for c in CHAR_INITIALS], dtype=np.uint32)
+    meds = np.array([ord(c) for c in CHAR_MEDIALS], dtype=np.uint32)
+    finals = np.array([0] + [ord(c) for c in CHAR_FINALS], dtype=np.uint32)
+    positions = np.full(_JAMO_LUT_SIZE, -1, dtype=np.int8)
+    indices = np.full((3, _JAMO_LUT_SIZE), -1, dtype=np.int8)
+    for c in CHARSET:
+        positions[ord(c)] = [x is not None
+                             for x in SPLIT_CHAR_TABLE[c]].index(True)
+        for k, pos in enumerate((INITIAL, MEDIAL, FINAL)):
+            indices[k, ord(c)] = CHAR_INDICES[pos].get(c, -1)
+    return inits, meds, finals, positions, indices
+
+
+_JAMO_LUT_SIZE = 0x3191
+
+
+def split_syllables_batch(texts, ignore_err=True, pad=None):
+    """
+    Performs syllable-split on a batch of strings at once. The batch is
+    converted into a single NumPy codepoint buffer and decomposed with array
+    arithmetic, which is much faster than `split_syllables` on large
+    corpora. NumPy is required.
+
+    Arguments:
+        texts (list): Strings (possibly mixed with non-Hangul characters).
+        ignore_err (bool): Same as in `split_syllables`. (default: True)
+        pad (str): Same as in `split_syllables`. (default: None)
+
+    Returns:
+        A list of Hangul-split strings, identical to calling
+        `split_syllables` on each string.
+    """
+    texts = list(texts)
+    if not ignore_err or (pad is not None and len(pad) != 1):
+        return [split_syllables(t, ignore_err, pad) for t in texts]
+
+    np = _import_numpy()
+    inits, meds, finals, positions, _ = _get_jamo_arrays()
+    codes, offsets = _to_codepoints(np, texts)
+    # every character takes up to three slots; unused slots are dropped
+    out = np.zeros((len(codes), 3), dtype=np.uint32)
+    keep = np.zeros((len(codes), 3), dtype=bool)
+    out[:, 0] = codes
+    keep[:, 0] = True
+
+    syl = np.flatnonzero((codes >= 0xac00) & (codes <= 0xd7a3))
+    x = codes[syl].astype(np.int64) - 0xac00
+    final = x % 28
+    out[syl, 0] = inits[x // 588]
+    out[syl, 1] = meds[(x % 588) // 28]
+    out[syl, 2] = finals[final]
+    keep[syl, 1] = True
+    keep[syl, 2] = final != 0
+
+    if pad is not None:
+        pad_code = ord(pad)
+        out[syl[final == 0], 2] = pad_code
+        keep[syl, 2] = True
+        pos = positions[np.minimum(codes, _JAMO_LUT_SIZE - 1)]
+        jamo = np.flatnonzero(pos >= 0)
+        pos = pos[jamo].astype(np.int64)
+        out[jamo] = pad_code
+        out[jamo, pos] = codes[jamo]
+        keep[jamo] = True
+
+    widths = keep[:, 0].astype(np.int64)
+    widths += keep[:, 1]
+    widths += keep[:, 2]
+    cum = np.zeros(len(codes) + 1, dtype=np.int64)
+    np.cumsum(widths, out=cum[1:])
+    return _from_codepoints(np, out[keep], cum[offsets])
+
+
+def join_jamos_batch(texts, ignore_err=True, pad=None):
+    """
+    Combines jamos into syllables for a batch of strings at once.
+
+    Without `pad`, this is `join_jamos` on each string. With `pad`, the
+    strings are expected to be padded splits (as produced by
+    `split_syllables(..., pad=pad)`), where jamos come in runs of
+    (initial, medial, final) slots. Such strings are joined with NumPy array
+    arithmetic and the exact original string is restored. Strings whose jamo
+    runs are not whole slot triples fall back to `join_jamos` with the pads
+    removed.
+
+    Arguments:
+        texts (list): Strings (possibly mixed with non-jamo characters).
+        ignore_err (bool): Same as in `join_jamos`. (default: True)
+        pad (str): The pad character used for splitting. It must be a single
+            character that is not a jamo. (default: None)
+
+    Returns:
+        A list of strings.
+    """
+    texts = list(texts)
+    if not ignore_err or pad is None or len(pad) != 1 or pad in CHARSET:
+        if pad is not None:
+            texts = [t.replace(pad, "") for t in texts]
+        return [join_jamos(t, ignore_err) for t in texts]
+
+    np = _import_numpy()
+    _, _, _, positions, indices = _get_jamo_arrays()
+    codes, offsets = _to_codepoints(np, texts)
+    n = len(codes)
+    is_pad = codes == ord(pad)
+    clipped = np.minimum(codes, _JAMO_LUT_SIZE - 1)
+    slot = (positions[clipped] >= 0) | is_pad
+
+    # split the buffer into runs of slots that do not cross string borders
+    starts = slot.copy()
+    starts[1:] &= ~slot[:-1]
+    borders = offsets[:-1][offsets[:-1] < n]
+    starts[borders] = slot[borders]
+    run = np.cumsum(starts) - 1
+    run_starts = np.flatnonzero(starts)
+    run_lens = np.bincount(run[slot], minlength=len(run_starts))
+    irregular = np.zeros(len(texts), dtype=bool)
+    irregular[np.searchsorted(offsets, run_starts[run_lens % 3 != 0],
+                              side="right") - 1] = True
+
+    keep = ~is_pad
+    out = codes.copy()
+    heads = np.flatnonzero(slot)
+    heads = heads[(heads - run_starts[run[heads]]) % 3 == 0]
+    if irregular.any():
+        heads = heads[~irregular[np.searchsorted(offsets, heads,
+                                                 side="right") - 1]]
+    idx = np.stack([indices[k, clipped[heads + k]]
+                    for k in range(3)]).astype(np.int64)
+    has_final = idx[2] >= 0
+    syl = (idx[0] >= 0) & (idx[1] >= 0) & (has_final | is_pad[heads + 2])
+    heads, idx, has_final = heads[syl], idx[:, syl], has_final[syl]
+    out[heads] = 0xac00 + (idx[0] * 21 + idx[1]) * 28 + \
+        np.where(has_final, idx[2] + 1, 0)
+    keep[heads + 1] = False
+    keep[heads + 2] = False
+
+    cum = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(keep, out=cum[1:])
+    joined = _from_codepoints(np, out[keep], cum[offsets])
+    for i in np.flatnonzero(irregular).tolist():
+        joined[i] = join_jamos(texts[i].replace(pad, ""), ignore_err)
+    return joined
@@ -1,7 +1,13 @@
 # encoding: UTF-8
 
 import io
+import os
+import re
+import socket
 import random
+import threading
+
+import pytest
 
 from hangul_utils import *
 
@@ -257,6 +263,14 @@ def test_split_str():
     assert r == "ㅇㅏㄴㄴㅕㅇㅎㅏㅅㅔㅇㅛ"
 
 
+def test_split_str_pad():
+    r = split_syllables("안녕하세요ㅛ", pad="x")
+    assert r == "ㅇㅏㄴㄴㅕㅇㅎㅏxㅅㅔxㅇㅛxxㅛx"
+
+    r = split_syllables("a안ㄳ!", pad="x")
+    assert r == "aㅇㅏㄴxxㄳ!"
+
+
 def test_split_str_long():
     r = split_syllables(SENT)
     assert r == SENT_SPLIT
@@ -274,6 +288,65 @@ def test_join_str():
     assert r == SENT
 
 
+def test_join_str_invalid():
+    assert join_jamos("ㅇㅏㄴㄴㄴㅕㅇ") == "안ㄴ녕"
+    assert join_jamos("ㅏㄴㄳㅏ") == "ㅏㄴㄳㅏ"
+
+    try:
+        join_jamos("ㅇㅏㄴㄴㄴㅕㅇ", ignore_err=False)
+    except ValueError:
+        pass
+    else:
+        assert False, "expected a ValueError"
+
+
+def test_composer():
+    composer = JamoComposer()
+    committed = [composer.feed(c) for c in "ㅇㅏㄴㄴㅕ"]
+    assert committed == ["", "", "", "안", ""]
+    assert composer.preedit == "녀"
+    assert composer.flush() == "녀"
+    assert composer.preedit == ""
+
+    for i in range(100):
+        s = generate(20)
+        composer = JamoComposer()
+        r = "".join(composer.feed(c) for c in s) + composer.flush()
+        assert r == join_jamos(s)
+
+
+def test_jamo_ids():
+    ids = encode_jamo_ids("안ㅋ")
+    assert list(ids) == [13, 21, 45, 17, 0, 0]
+    assert decode_jamo_ids(ids) == "안ㅋ"
+
+    ids = encode_jamo_ids("안ㅋ", fixed=False)
+    assert list(ids) == [13, 21, 45, 17]
+    assert decode_jamo_ids(ids, fixed=False) == "안ㅋ"
+
+    sents = [SENT, "", "ㄳ"]
+    ids, offsets = encode_jamo_ids(sents, extra=" ,.")
+    assert list(offsets) == [0, len(SENT) * 3, len(SENT) * 3, len(SENT) * 3 + 3]
+    assert decode_jamo_ids(ids, offsets=offsets, extra=" ,.") == sents
+
+    ids = encode_jamo_ids(sents, max_len=6)
+    assert len(ids) == 18
+    assert decode_jamo_ids(ids, offsets=[0, 6, 12, 18]) == ["앞\ufffd", "", "ㄳ"]
+
+
+def test_batch():
+    pytest.importorskip("numpy")
+    sents = [SENT, "", "ㅛ안ㄳ a"]
+    for pad in (None, "x"):
+        r = split_syllables_batch(sents, pad=pad)
+        assert r == [split_syllables(s, pad=pad) for s in sents]
+
+    r = split_syllables_batch(sents, pad="x")
+    assert join_jamos_batch(r, pad="x") == sents
+    assert join_jamos_batch(["ㅇㅏxㄴ"], pad="x") == ["안"]
+    assert join_jamos_batch([SENT_SPLIT]) == [SENT]
+
+
 def test_join_random():
     for i in range(100):
         print(join_jamos(generate(20)))
@@ -311,3 +384,653 @@ def test_sent_word_tokenize():
 def test_sent_morph_tokenize():
     ret = sent_morph_tokenize(SENT)
     assert all(list_compare(a, b) for a, b in zip(ret, SENT_SENT_MORPHS))
+
+
+def test_mecab_pool():
+    p = Preprocessor()
+    mecab = p._mecab
+    assert list_compare(p.morph_tokenize(SENT), SENT_MORPHS)
+    assert p._mecab is mecab
+
+    taggers = []
+    t = threading.Thread(target=lambda: taggers.append(p._mecab))
+    t.start()
+    t.join()
+    assert taggers[0] is not mecab
+
+
+def test_analyze():
+    doc = analyze(SENT)
+    assert doc.sentences() == SENT_SENTS
+    assert doc.words() == SENT_WORDS
+    assert doc.morphs() == SENT_MORPHS
+    assert doc.morphs(pos=True) == SENT_MORPHS_POS
+    assert doc.sent_words() == SENT_SENT_WORDS
+    assert doc.sent_morphs() == SENT_SENT_MORPHS
+    assert all(SENT[s:e] == m for (s, e), m in
+               zip(doc.morph_spans, SENT_MORPHS))
+
+
+def test_spans():
+    spans = list(sent_spans(SENT))
+    assert [SENT[s:e] for s, e in spans] == SENT_SENTS
+
+    spans = list(word_spans(SENT))
+    assert [SENT[s:e] for s, e in spans] == SENT_WORDS
+
+    spans = list(morph_spans(SENT, pos=True))
+    assert [(SENT[s:e], p) for (s, e), p in spans] == SENT_MORPHS_POS
+
+
+def test_cache():
+    cache = LRUCache(max_entries=2)
+    p = Preprocessor(cache=cache)
+
+    for text in (SENT, SENT, SENT2, "", SENT):
+        assert list(p.morph_tokenize(text, pos=True)) == \
+            list(morph_tokenize(text, pos=True))
+
+    assert list(p.sent_tokenize(SENT)) == SENT_SENTS
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 4
+    assert stats["evictions"] == 2
+    assert stats["entries"] == 2
+
+    cache = LRUCache(max_bytes=1)
+    p = Preprocessor(cache=cache)
+    assert list(p.morph_tokenize(SENT)) == SENT_MORPHS
+    assert len(cache) == 0
+
+
+def test_disk_cache(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = DiskCache(path)
+    p = Preprocessor(cache=cache)
+    assert list(p.morph_tokenize(SENT, pos=True)) == SENT_MORPHS_POS
+    cache.close()
+
+    cache = DiskCache(path, max_bytes=1000)
+    p = Preprocessor(cache=cache)
+    assert list(p.morph_tokenize(SENT, pos=True)) == SENT_MORPHS_POS
+    assert cache.stats()["hits"] == 1
+
+    for i in range(100):
+        cache.put(str(i), "x" * 100)
+    assert cache.stats()["bytes"] <= 1000
+    assert cache.get("99") == "x" * 100
+    cache.compact()
+    cache.close()
+
+    cache = DiskCache(str(tmp_path / "rewrite.db"), max_bytes=1000)
+    cache.put("key", "x" * 100)
+    size = cache.stats()["bytes"]
+    cache.put("key", "y" * 100)
+    cache.put("key", "z" * 200)
+    assert cache.stats()["bytes"] == size + 100
+    assert cache.stats()["entries"] == 1
+    assert cache.evictions == 0
+    cache.close()
+
+    # the limit holds for all instances on a database together
+    path = str(tmp_path / "shared.db")
+    caches = [DiskCache(path, max_bytes=10000) for _ in range(8)]
+    for i, cache in enumerate(caches):
+        for j in range(9):
+            cache.put((i, j), "x" * 1000)
+    assert caches[0].stats()["bytes"] <= 10000
+    assert sum(cache.evictions for cache in caches) > 0
+    for cache in caches:
+        cache.close()
+
+
+def _worker_cache_connection():
+    from hangul_utils import preprocess
+    return id(preprocess._worker_preprocessor._cache._conn)
+
+
+def test_pipe_disk_cache(tmp_path):
+    import multiprocessing
+    from hangul_utils.preprocess import _init_worker
+
+    cache = DiskCache(str(tmp_path / "cache.db"))
+    p = Preprocessor(cache=cache)
+    texts = [SENT, SENT2, "", SENT] * 5
+    assert list(p.pipe(texts, n_process=2, task="pos")) == \
+        [list(morph_tokenize(text, pos=True)) for text in texts]
+    # the workers wrote through connections of their own
+    assert len(cache) == 3
+    assert cache.stats()["hits"] == cache.stats()["misses"] == 0
+
+    with multiprocessing.Pool(1, initializer=_init_worker,
+                              initargs=(p, False)) as pool:
+        assert pool.apply(_worker_cache_connection) != id(cache._conn)
+
+    assert p._cache is cache
+    cache.close()
+
+
+def test_tag_ids_threads():
+    import sys
+    from hangul_utils.document import _TAGS, tag_id
+
+    tags = [f"TEST{i}" for i in range(5000)]
+    interval = sys.getswitchinterval()
+
+    def intern(order):
+        for tag in order:
+            tag_id(tag)
+
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=intern,
+                                    args=(random.sample(tags, len(tags)),))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert all(_TAGS[tag_id(tag)] == tag for tag in tags)
+
+
+def test_pipe():
+    p = Preprocessor(cache=LRUCache(max_entries=10))
+    texts = [SENT, SENT2, "", SENT] * 5
+
+    for n_process in (1, 2):
+        assert list(p.pipe(texts, batch_size=3, n_process=n_process)) == \
+            [list(morph_tokenize(text)) for text in texts]
+
+    assert list(p.pipe(texts, n_process=2, task="sent", residual=False)) == \
+        [list(sent_tokenize(text, residual=False)) for text in texts]
+    assert list(p.pipe(texts, batch_size=3, n_threads=3, task="pos")) == \
+        [list(morph_tokenize(text, pos=True)) for text in texts]
+
+    with pytest.raises(ValueError):
+        list(p.pipe(texts, task="unknown"))
+
+    with pytest.raises(ValueError):
+        list(p.pipe(texts, n_process=2, n_threads=2))
+
+
+def test_async_preprocessor():
+    import asyncio
+
+    async def run():
+        async with AsyncPreprocessor(max_workers=2, max_batch_size=4,
+                                     max_pending=2) as p:
+            texts = [SENT, SENT2, ""] * 5
+            results = await asyncio.gather(
+                *(p.morph_tokenize(text, pos=True) for text in texts)
+            )
+            assert results == [list(morph_tokenize(text, pos=True))
+                               for text in texts]
+            assert await p.sent_tokenize(SENT) == SENT_SENTS
+
+            task = asyncio.ensure_future(p.morph_tokenize(SENT))
+            await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            assert await p.morph_tokenize(SENT) == SENT_MORPHS
+
+            # a failing request does not fail the rest of its batch
+            results = await asyncio.gather(
+                p.morph_tokenize(SENT), p.morph_tokenize(None),
+                p.sent_tokenize(SENT), return_exceptions=True
+            )
+            assert results[0] == SENT_MORPHS
+            assert isinstance(results[1], Exception)
+            assert results[2] == SENT_SENTS
+
+    asyncio.run(run())
+
+    class CountingNormalizer(object):
+
+        def __init__(self):
+            self.calls = 0
+
+        def normalize_batch(self, texts):
+            self.calls += 1
+            return [text.upper() for text in texts]
+
+    async def run_normalize():
+        normalizer = CountingNormalizer()
+        preprocessor = Preprocessor(normalizer=normalizer)
+
+        async with AsyncPreprocessor(preprocessor, max_workers=1,
+                                     max_batch_size=8, max_latency=1) as p:
+            texts = [f"text {i}" for i in range(8)]
+            results = await asyncio.gather(*map(p.normalize, texts))
+            assert results == [text.upper() for text in texts]
+
+        assert normalizer.calls == 1
+
+    asyncio.run(run_normalize())
+
+    async def run_close():
+        # requests of a batch that is still filling up fail on close
+        p = AsyncPreprocessor(max_workers=1, max_latency=1)
+        task = asyncio.ensure_future(p.morph_tokenize(SENT))
+        await asyncio.sleep(0.1)
+        await p.close()
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(task, 1)
+
+        # as do those of a full batch waiting for a busy worker
+        gate = threading.Event()
+
+        class BlockingNormalizer(object):
+
+            def normalize_batch(self, texts):
+                gate.wait()
+                return texts
+
+        preprocessor = Preprocessor(normalizer=BlockingNormalizer())
+        p = AsyncPreprocessor(preprocessor, max_workers=1, max_batch_size=1)
+        busy = asyncio.ensure_future(p.normalize(SENT))
+        await asyncio.sleep(0.1)
+        waiting = asyncio.ensure_future(p.normalize(SENT2))
+        await asyncio.sleep(0.1)
+        closing = asyncio.ensure_future(p.close())
+        await asyncio.sleep(0.1)
+        gate.set()
+        await asyncio.wait_for(closing, 1)
+        assert await busy == SENT
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(waiting, 1)
+
+    asyncio.run(run_close())
+
+
+def test_shard_offsets(tmp_path):
+    from hangul_utils.run import shard_offsets
+
+    path = tmp_path / "input.txt"
+    data = "".join(f"{SENT}\n" * random.randint(0, 3) for _ in range(50))
+    path.write_bytes(data.encode("utf-8"))
+    size = path.stat().st_size
+
+    for n in (1, 2, 7, 1000):
+        shards = shard_offsets(str(path), n)
+        assert shards[0][0] == 0 and shards[-1][1] == size
+        assert len(shards) <= n
+        for (_, end), (start, _) in zip(shards, shards[1:]):
+            assert end == start
+            assert data.encode("utf-8")[end - 1:end] == b"\n"
+
+
+def test_cli_chunks(tmp_path, monkeypatch):
+    from hangul_utils.run import main
+
+    input_path = tmp_path / "input.txt"
+    lines = [f"{i}번째 줄입니다. {random.choice([SENT, SENT2, ''])}"
+             for i in range(50)]
+    input_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    def run(*options):
+        output_path = tmp_path / "output.txt"
+        monkeypatch.setattr("sys.argv", ["hangul-process", str(input_path),
+                                         str(output_path), "-s", "-m",
+                                         *options])
+        main()
+        return output_path.read_text(encoding="utf-8")
+
+    expected = run()
+    assert expected.count("\n") > 50
+    assert expected.startswith("0 번 째 줄 입니다 .\n")
+    for options in (("--processes", "2"), ("--threads", "2")):
+        assert run(*options, "--chunk-size", "3", "--max-chunks", "2") == \
+            expected
+
+
+def test_pipeline():
+    import argparse
+    from hangul_utils.run import Pipeline
+
+    options = dict(normalize=False, sentencize=True, delimiter=" ",
+                   sentence_delimiter="\n", word_tokenize=False,
+                   morph_tokenize=True, pos_tokenize=False,
+                   split_syllables=False, join_jamos=False)
+    pipeline = Pipeline(argparse.Namespace(**options))
+    assert pipeline(SENT) == "\n".join(" ".join(morphs)
+                                       for morphs in SENT_SENT_MORPHS)
+    assert pipeline("") == ""
+
+    options.update(sentencize=False, morph_tokenize=False, pos_tokenize=True,
+                   split_syllables=True)
+    pipeline = Pipeline(argparse.Namespace(**options))
+    assert pipeline(SENT) == split_syllables(
+        " ".join(pos for _, pos in SENT_MORPHS_POS)
+    )
+
+
+STREAM_PIECES = ["안녕", "하세요", "좋아", "진짜", "그래서", "했다", "입니다",
+                 "요", "다", "ㅋㅋ", ".", "?", "!", "...", "?!", "!!", "~", ",",
+                 "\"", "'", "(", ")", "1.5", "Mr.", "U.S.", "a", " ", " ",
+                 " ", "\n"]
+
+
+def test_sent_tokenize_stream():
+    rnd = random.Random(0)
+    texts = [" ".join([SENT, SENT2, "3.14는 원주율이다.", "Hello world. Mr. Kim"]
+                      * 10),
+             "정말?! " + "진짜 좋아 " * 20 + "끝."]
+    texts += ["".join(rnd.choice(STREAM_PIECES)
+                      for _ in range(rnd.randint(0, 300)))
+              for _ in range(40)]
+
+    for text in texts:
+        for residual in (True, False):
+            sents = list(sent_tokenize(text, residual=residual))
+            sent_words = list(sent_word_tokenize(text, residual=residual))
+
+            for window_size in (1, 7, 50, 333):
+                assert list(sent_tokenize_stream(
+                    io.StringIO(text), residual=residual,
+                    window_size=window_size
+                )) == sents
+                assert list(sent_word_tokenize_stream(
+                    (word + " " for word in text.split(" ")), residual=residual,
+                    window_size=window_size
+                )) == list(sent_word_tokenize(text + " ", residual=residual))
+                assert list(sent_word_tokenize_stream(
+                    text, residual=residual, window_size=window_size
+                )) == sent_words
+
+    assert list(sent_tokenize_stream("")) == []
+
+
+def test_morph_features():
+    mecab = Preprocessor()._mecab
+    chars = "가나다 한국어입니다.,!?\t\n　\xa0abc123EOS#\"ㅋㅏ​"
+    for _ in range(200):
+        text = "".join(random.choice(chars)
+                       for _ in range(random.randint(0, 30)))
+        assert mecab.parse(text) == list(mecab.parse_nodes(text))
+
+    morphs = list(morph_features("봤어요"))
+    assert [m for m, _ in morphs] == ["봤", "어요"]
+    features = morphs[0][1]
+    assert features.pos == "VV+EP"
+    assert features.has_final is True
+    assert features.type == "Inflect"
+    assert features.semantic is None
+    assert features.expression == [("보", "VV"), ("았", "EP")]
+    assert morphs[1][1].expression == []
+
+
+def test_token_batch():
+    import pickle
+
+    for text in (SENT, SENT2, "", "마침표 없음"):
+        batch = morph_tokenize(text, columnar=True)
+        assert len(batch) == len(list(morph_tokenize(text)))
+        assert batch.morphs() == list(morph_tokenize(text))
+        assert list(batch) == list(morph_tokenize(text, pos=True))
+        assert pickle.loads(pickle.dumps(batch)) == batch
+
+        for residual in (True, False):
+            batch = sent_morph_tokenize(text, residual=residual,
+                                        columnar=True)
+            assert batch.sent_morphs(pos=True) == list(sent_morph_tokenize(
+                text, residual=residual, pos=True
+            ))
+
+    batch = morph_tokenize(SENT, columnar=True)
+    assert batch[0] == SENT_MORPHS_POS[0]
+    assert batch.pos_tags == [pos for _, pos in SENT_MORPHS_POS]
+    assert batch.sent_morphs() == SENT_SENT_MORPHS
+
+
+# Outputs of the original implementations for texts that end sentences with
+# several symbols.
+SF_RUN_CASES = [
+    ("정말?! 진짜 좋아",
+     ["정말?", "! 진짜 좋아"],
+     [["정말", "?", "!"], ["진짜", "좋아"]],
+     [["정말", "?"], ["!", "진짜", "좋", "아"]]),
+    ("음... 그렇구나. 좋아!!",
+     ["음.", ".. 그렇구나.", "좋아!", "!"],
+     [["음", ".", ".."], ["그렇구나", "."], ["좋아", "!", "!"]],
+     [["음", "."], ["..", "그렇", "구나", "."], ["좋", "아", "!"], ["!"]]),
+    ("와!! 대박",
+     ["와!", "! 대박"],
+     [["와", "!", "!"], ["대박"]],
+     [["와", "!"], ["!", "대박"]])
+]
+
+
+def test_sent_grouping_baseline():
+    for text, sents, sent_words, sent_morphs in SF_RUN_CASES:
+        assert list(sent_tokenize(text)) == sents
+        assert list(sent_word_tokenize(text)) == sent_words
+        assert list(sent_morph_tokenize(text)) == sent_morphs
+        assert sent_morph_tokenize(text, columnar=True).sent_morphs() == \
+            sent_morphs
+
+    assert list(sent_word_tokenize("정말?! 진짜 좋아", residual=False)) == \
+        [["정말", "?", "!"]]
+    assert list(sent_word_tokenize("와!! 대박.", residual=False)) == \
+        [["와", "!", "!"], ["대박", "."]]
+
+
+def test_corpus(tmp_path):
+    path = str(tmp_path / "corpus")
+    docs = [[list(zip(*sent)) for sent in
+             sent_morph_tokenize(text, pos=True)]
+            for text in (SENT, "", SENT2, "마침표 없음\r끝")]
+
+    with CorpusWriter(path) as writer:
+        for doc in docs:
+            writer.add(doc)
+
+    with Corpus(path) as corpus:
+        assert len(corpus) == len(docs)
+        assert corpus.num_sents == sum(map(len, docs))
+        for i, doc in enumerate(docs):
+            assert [list(zip(*sent)) for sent in
+                    corpus.document(i, pos=True)] == doc
+        assert corpus.sentence(0) == SENT_SENT_MORPHS[0]
+        token_ids, pos_ids = corpus.sentence_ids(0)
+        assert [corpus.pos_tags[p] for p in pos_ids] == \
+            [pos for _, pos in SENT_MORPHS_POS[:len(token_ids)]]
+
+
+def test_throughput_reporter():
+    from hangul_utils.run import ThroughputReporter
+
+    stream = io.StringIO()
+    reporter = ThroughputReporter(0, stream)
+    reporter.update(10, 2000000, 50)
+    reporter.update(5, 1000000, 0, 4)
+    reporter.close()
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 3
+    assert lines[0].startswith("10 lines, 2.0 MB, 50 tokens; ")
+    assert lines[-1].startswith(
+        "15 lines (4 not normalized), 3.0 MB, 50 tokens; "
+    )
+
+    stream = io.StringIO()
+    reporter = ThroughputReporter(None, stream)
+    reporter.update(10, 2000000, 50)
+    reporter.close()
+    assert stream.getvalue() == ""
+
+
+class UpperNormalizer(object):
+    """Stands in for the JVM-backed normalizer."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def normalize(self, text):
+        self.calls += 1
+        return text.upper()
+
+
+def test_normalize_batch():
+    from hangul_utils.preprocess import join_normalize
+
+    normalizer = UpperNormalizer()
+    assert join_normalize(normalizer.normalize, ["a", "b", "c"]) == \
+        ["A", "B", "C"]
+    assert normalizer.calls == 1
+    assert join_normalize(normalizer.normalize, ["a\nb", "c", ""]) == \
+        ["A\nB", "C", ""]
+    assert normalizer.calls == 4
+
+    with NormalizerServer(UpperNormalizer) as server:
+        client = server.client()
+        assert client.normalize_batch(["abc", "안녕 def"]) == \
+            ["ABC", "안녕 DEF"]
+
+        cache = LRUCache()
+        p = Preprocessor(cache=cache, normalizer=client)
+        assert p.normalize_batch(["x", "y", "x"]) == ["X", "Y", "X"]
+        assert p.normalize("x") == "X"
+        assert cache.stats()["hits"] == 1
+
+        with pytest.raises(RuntimeError):
+            client.normalize_batch([None, None])
+
+
+class JamoNormalizer(object):
+    """Shortens repeated ㅋ, like open-korean-text does."""
+
+    def normalize_batch(self, texts):
+        return [re.sub("ㅋ{3,}", "ㅋㅋ", text).replace("good", "GOOD")
+                for text in texts]
+
+
+def test_needs_normalization():
+    assert not needs_normalization("안녕하세요. 좋은 아침입니다.")
+    assert not needs_normalization("2000년 3월 1일, hello world")
+    assert needs_normalization("ㅋㅋㅋㅋ")
+    assert needs_normalization("하하하하하")
+    assert needs_normalization("우와아아")
+    assert needs_normalization("정말!!!")
+    assert needs_normalization("이거 작간데")
+    assert needs_normalization("어제 햇는데")
+
+    # every text is normalized by default
+    p = Preprocessor(normalizer=JamoNormalizer())
+    assert p.normalize_batch(["웃기다 ㅋㅋㅋㅋ", "so good"]) == \
+        ["웃기다 ㅋㅋ", "so GOOD"]
+    assert p.normalize_skipped == 0
+
+    p = Preprocessor(normalizer=JamoNormalizer(), precheck=True)
+    assert p.normalize_batch(["웃기다 ㅋㅋㅋㅋ", "so good"]) == \
+        ["웃기다 ㅋㅋ", "so good"]
+    assert p.normalize_skipped == 1
+
+    p = Preprocessor(normalizer=JamoNormalizer(), precheck="strict")
+    with pytest.warns(UserWarning):
+        assert p.normalize_batch(["웃기다 ㅋㅋㅋㅋ", "so good"]) == \
+            ["웃기다 ㅋㅋ", "so GOOD"]
+    assert p.normalize_skipped == 0
+    assert p.normalize_mismatches == 1
+
+    with pytest.raises(ValueError):
+        Preprocessor(precheck="lenient")
+
+
+def test_normalize_skipped_lines():
+    import argparse
+    from hangul_utils.run import init_worker, process_lines
+
+    lines = ["웃기다 ㅋㅋㅋㅋ\n", "so good\n", "  so good  \n", "좋다\n"]
+    lines = [line.encode("utf-8") for line in lines]
+    options = dict(normalize=True, normalizer=JamoNormalizer(), cache=None,
+                   sentencize=False, delimiter=" ", sentence_delimiter="\n",
+                   word_tokenize=False, morph_tokenize=False,
+                   pos_tokenize=False, split_syllables=False,
+                   join_jamos=False)
+
+    init_worker(argparse.Namespace(**options))
+    result = process_lines(lines)
+    assert result[3] == 3
+    assert result[4].decode("utf-8").splitlines() == \
+        ["웃기다 ㅋㅋ", "so good", "so good", "좋다"]
+    assert process_lines(lines[:2])[3] == 1
+
+    init_worker(argparse.Namespace(normalize_strict=True, **options))
+    with pytest.warns(UserWarning):
+        result = process_lines(lines)
+    assert result[3] == 0
+    assert "so GOOD" in result[4].decode("utf-8")
+
+
+def test_normalize_strict_cache(tmp_path, monkeypatch):
+    import argparse
+    from hangul_utils import run
+
+    lines = ["so good\n".encode("utf-8")]
+    options = dict(normalize=True, normalizer=JamoNormalizer(),
+                   cache=str(tmp_path / "cache.db"), cache_size=None,
+                   sentencize=False, delimiter=" ", sentence_delimiter="\n",
+                   word_tokenize=False, morph_tokenize=False,
+                   pos_tokenize=False, split_syllables=False,
+                   join_jamos=False)
+
+    monkeypatch.setattr(run, "_cache", None)
+    run.init_worker(argparse.Namespace(normalize_strict=False, **options))
+    assert run.process_lines(lines)[4] == b"so good\n"
+    run._cache.close()
+
+    # lines that skipped normalization are not served to strict runs
+    monkeypatch.setattr(run, "_cache", None)
+    run.init_worker(argparse.Namespace(normalize_strict=True, **options))
+    with pytest.warns(UserWarning):
+        assert run.process_lines(lines)[4] == b"so GOOD\n"
+    run._cache.close()
+
+
+def test_tokenizer_server(tmp_path):
+    path = str(tmp_path / "tokenizer.sock")
+    p = Preprocessor(normalizer=JamoNormalizer())
+
+    with TokenizerServer(path, p, n_threads=2) as server:
+        server.serve_in_thread()
+        client = TokenizerClient(path)
+        assert client.morph_tokenize(SENT2, pos=True) == \
+            list(p.morph_tokenize(SENT2, pos=True))
+        sock = client._local.sock
+        assert client.batch("sent_word", [SENT2, ""]) == \
+            [list(map(list, p.sent_word_tokenize(SENT2))), []]
+        assert client.normalize("ㅋㅋㅋㅋ") == "ㅋㅋ"
+        # the connection is reused
+        assert client._local.sock is sock
+
+        with pytest.raises(RuntimeError):
+            client.batch("unknown", [SENT2])
+
+        # and made again when the server drops it
+        sock.shutdown(socket.SHUT_RDWR)
+        assert client.word_tokenize("안녕 하세요") == ["안녕", "하세요"]
+        client.close()
+
+        with pytest.raises(RuntimeError):
+            TokenizerServer(path).start()
+
+    assert not os.path.exists(path)
+
+
+def test_process_memory():
+    from hangul_utils.parallel import process_memory
+    from hangul_utils.run import report_memory
+
+    usage = process_memory()
+    if usage is None:
+        pytest.skip("/proc/<pid>/smaps_rollup is not available")
+    assert usage["rss"] >= usage["pss"] > 0
+    assert usage["rss"] == usage["shared"] + usage["private"]
+    assert process_memory(2 ** 22 + 1) is None
+
+    stream = io.StringIO()
+    report_memory(stream)
+    assert stream.getvalue().splitlines()[-1].startswith("total: RSS ")